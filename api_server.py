@@ -2,16 +2,27 @@ from typing import Any, Dict, List, Optional
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from extractor import extract_travel_info
 from app_cool import ai_travel_agent_agno, second_stage_agent
-from housing_listings import housing_id_dict
-from cuisine_listings import cuisine_id_dict
-from experience_listings import experience_id_dict
+from candidates import PAGE_SIZE, candidate_page
+from catalog import CATEGORIES, catalog
+from geo import locate
+from personalization import taste_of
+from seen_filter import seen_of
+from query_cache import query_cache
+
+# Live views: they follow catalog hot reloads
+housing_id_dict = catalog.id_view("housing")
+cuisine_id_dict = catalog.id_view("cuisine")
+experience_id_dict = catalog.id_view("experience")
+catalog.watch()
 
 
 class PlanIn(BaseModel):
+    username: Optional[str] = None
     freeform_text: Optional[str] = None
     dates: Optional[List[str]] = None
     travelers: Optional[int] = None
@@ -31,6 +42,39 @@ class DetailsIn(BaseModel):
     experience_ids: List[str] = []
 
 
+class CandidatesIn(BaseModel):
+    username: Optional[str] = None
+    category: str
+    user_preferences: Dict[str, Any]
+    travel_info: Dict[str, Any]
+    cursor: Optional[str] = None
+    limit: int = PAGE_SIZE
+
+
+class SearchIn(BaseModel):
+    category: str
+    location: str
+    query: str
+    limit: int = 10
+
+
+class SimilarIn(BaseModel):
+    category: str
+    id: str
+    limit: int = 10
+
+
+class NearbyIn(BaseModel):
+    category: str
+    location: str
+    km: float = 1.0
+    place: Optional[str] = None
+    housing_ids: List[str] = []
+    cuisine_ids: List[str] = []
+    experience_ids: List[str] = []
+    limit: int = 20
+
+
 app = FastAPI(title="TravelEase API", version="0.1.0")
 
 app.add_middleware(
@@ -47,6 +91,11 @@ def health() -> Dict[str, Any]:
     return {"ok": True}
 
 
+@app.get("/api/stats")
+def stats() -> Dict[str, Any]:
+    return {"catalog": catalog.stats(), "query_cache": query_cache.stats()}
+
+
 @app.post("/api/ai-plan")
 def api_ai_plan(body: PlanIn) -> Dict[str, Any]:
     """Create curated ID lists for housing/cuisine/experiences.
@@ -76,11 +125,12 @@ def api_ai_plan(body: PlanIn) -> Dict[str, Any]:
             "desired_amenities": extracted.get("desired_amenities", []),
             "total_budget": extracted.get("total_budget", 0),
             "travelers": extracted.get("travelers", 1),
+            "trip_description": body.freeform_text or "",
             "cuisine_preferences": extracted.get("cuisine_preferences", []),
             "experience_preferences": extracted.get("experience_preferences", []),
         }
 
-    recs = ai_travel_agent_agno(user_prefs, travel_info)
+    recs = ai_travel_agent_agno(user_prefs, travel_info, body.username)
     return {
         "success": True,
         "housing_ids": recs.housing_ids,
@@ -134,9 +184,59 @@ def api_details(body: DetailsIn) -> Dict[str, Any]:
     return {"success": True, "housing": housing, "cuisine": cuisine, "experience": experience}
 
 
+@app.post("/api/nearby")
+def api_nearby(body: NearbyIn) -> Dict[str, Any]:
+    """Listings of `category` within km of a named place and/or of the given listings."""
+    if body.category not in CATEGORIES:
+        return JSONResponse({"success": False, "error": f"unknown category {body.category!r}"}, status_code=400)
+    points = []
+    if body.place:
+        points.append(locate(body.location, body.place))
+    for category, ids in (("housing", body.housing_ids), ("cuisine", body.cuisine_ids), ("experience", body.experience_ids)):
+        points += catalog.points(category, ids)
+    store, rows, dist = catalog.near(body.category, body.location, points, body.km)
+    nearest = dist.argsort(kind="stable")[:body.limit]
+    results = [{**store.records[r], "distance_km": round(float(d), 3)} for r, d in zip(rows[nearest], dist[nearest])]
+    return {"success": True, "results": results}
+
+
+@app.post("/api/search")
+def api_search(body: SearchIn) -> Dict[str, Any]:
+    """BM25 full-text search over experience descriptions/companies and restaurant names."""
+    if body.category not in CATEGORIES:
+        return JSONResponse({"success": False, "error": f"unknown category {body.category!r}"}, status_code=400)
+    store, rows, scores = catalog.search(body.category, body.location, body.query, body.limit)
+    results = [{**store.records[r], "score": round(float(s), 4)} for r, s in zip(rows, scores)]
+    return {"success": True, "results": results}
+
+
+@app.post("/api/candidates")
+def api_candidates(body: CandidatesIn) -> Dict[str, Any]:
+    """Ranked candidates one page at a time; pass next_cursor back with the same query for the next page."""
+    if body.category not in CATEGORIES:
+        return JSONResponse({"success": False, "error": f"unknown category {body.category!r}"}, status_code=400)
+    try:
+        results, next_cursor = candidate_page(
+            body.category, body.user_preferences, body.travel_info, body.cursor, body.limit, taste_of(body.username), seen_of(body.username)
+        )
+    except ValueError as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+    return {"success": True, "results": results, "next_cursor": next_cursor}
+
+
+@app.post("/api/similar")
+def api_similar(body: SimilarIn) -> Dict[str, Any]:
+    """Listings most like the given one, in the same city, nearest first."""
+    if body.category not in CATEGORIES:
+        return JSONResponse({"success": False, "error": f"unknown category {body.category!r}"}, status_code=400)
+    store, rows, dist = catalog.similar(body.category, body.id, body.limit)
+    if store is None:
+        return JSONResponse({"success": False, "error": f"no {body.category} listing {body.id!r}"}, status_code=404)
+    results = [{**store.records[r], "distance": round(float(d), 4)} for r, d in zip(rows, dist)]
+    return {"success": True, "results": results}
+
+
 if __name__ == "__main__":
     import uvicorn
 
     uvicorn.run("api_server:app", host="0.0.0.0", port=8000, reload=True)
-
-
@@ -1,4 +1,7 @@
 import os
+import secrets
+import threading
+from collections import OrderedDict
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify
 from dotenv import load_dotenv
 from openai import OpenAI
@@ -7,9 +10,16 @@ from flask_login import LoginManager, UserMixin, login_user, logout_user, login_
 from werkzeug.security import generate_password_hash, check_password_hash
 from extractor import extract_travel_info
 from app_cool import ai_travel_agent_agno, second_stage_agent
-from housing_listings import housing_id_dict
-from cuisine_listings import cuisine_id_dict
-from experience_listings import experience_id_dict
+from candidates import PAGE_SIZE, candidate_page, swipe_update
+from catalog import CATEGORIES, catalog
+from personalization import new_session_model, taste_of
+from seen_filter import buffer_seen, mark_seen, seen_of
+
+# Live views: they follow catalog hot reloads
+housing_id_dict = catalog.id_view("housing")
+cuisine_id_dict = catalog.id_view("cuisine")
+experience_id_dict = catalog.id_view("experience")
+catalog.watch()
 
 # --- Load environment variables ---
 load_dotenv()
@@ -133,11 +143,12 @@ def api_ai_plan():
                 "desired_amenities": extracted.get("desired_amenities", []),
                 "total_budget": extracted.get("total_budget", 0),
                 "travelers": extracted.get("travelers", 1),
+                "trip_description": freeform_text or "",
                 "cuisine_preferences": extracted.get("cuisine_preferences", []),
                 "experience_preferences": extracted.get("experience_preferences", []),
             }
 
-        recs = ai_travel_agent_agno(user_prefs, travel_info)
+        recs = ai_travel_agent_agno(user_prefs, travel_info, payload.get("username"))
         return jsonify({
             "success": True,
             "housing_ids": recs.housing_ids,
@@ -161,10 +172,76 @@ def api_itinerary():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route("/api/candidates", methods=["POST"])
+def api_candidates():
+    payload = request.get_json(force=True, silent=True) or {}
+    category = payload.get("category")
+    if category not in CATEGORIES:
+        return jsonify({"success": False, "error": f"unknown category {category!r}"}), 400
+    try:
+        results, next_cursor = candidate_page(
+            category,
+            payload.get("user_preferences") or {},
+            payload.get("travel_info") or {},
+            payload.get("cursor"),
+            payload.get("limit") or PAGE_SIZE,
+            taste_of(payload.get("username")),
+            seen_of(payload.get("username")),
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, "results": results, "next_cursor": next_cursor})
+
+# --- Swipe decks ---
+# The deck, swipes and session models of each swipe session are kept here,
+# not in the cookie session, which Flask drops past ~4 KB (and the login with
+# it); the cookie only carries the deck's token. Oldest decks go first.
+MAX_DECKS = 4096
+_decks = OrderedDict()
+_decks_lock = threading.Lock()
+
+def new_deck(user_preferences_dict, travel_info_dict, candidates):
+    deck = {
+        "travel_info_dict": travel_info_dict,
+        "user_preferences_dict": user_preferences_dict,
+        "candidates": candidates,
+        "likes": {"housing": [], "cuisine": [], "experience": []},
+        "dislikes": {"housing": [], "cuisine": [], "experience": []},
+        # "" = first page not fetched yet, None = deck exhausted
+        "cursors": {"housing": "", "cuisine": "", "experience": ""},
+        "session_models": {},
+        # Swipes not yet written to the user's seen filter
+        "unsaved": {},
+    }
+    token = secrets.token_urlsafe(16)
+    with _decks_lock:
+        _decks[token] = deck
+        while len(_decks) > MAX_DECKS:
+            _decks.popitem(last=False)
+    session["deck"] = token
+    return deck
+
+def current_deck():
+    """This session's swipe deck; an empty one if it never started or has expired."""
+    with _decks_lock:
+        deck = _decks.get(session.get("deck"))
+        if deck is not None:
+            _decks.move_to_end(session["deck"])
+            return deck
+    return new_deck({}, {}, {"housing_ids": [], "cuisine_ids": [], "experience_ids": []})
+
 # --- New: start flow from freeform prompt + dates + travelers ---
+def save_swipes():
+    """Write the swipes still buffered in this session to the user's seen filter, so later trips skip them."""
+    unsaved = current_deck()["unsaved"]
+    mark_seen(current_user.username, unsaved)
+    unsaved.clear()
+
 @app.route("/start", methods=["POST"]) 
 @login_required
 def start():
+    # A previous deck that was never finalized still counts as seen
+    save_swipes()
     # Gather inputs
     freeform_text = request.form.get("freeform_text", "")
     input_dates = request.form.get("dates", "").strip()
@@ -195,23 +272,20 @@ def start():
         "dates": extracted.get("dates", []),
         "desired_amenities": extracted.get("desired_amenities", []),
         "travelers": extracted.get("travelers") or travelers or 1,
+        "trip_description": freeform_text or "",
         "cuisine_preferences": user_preferences_dict["cuisine_types"],
         "experience_preferences": user_preferences_dict["experience_types"],
     }
 
     # Run agent
-    recs = ai_travel_agent_agno(user_preferences_dict, travel_info_dict)
+    recs = ai_travel_agent_agno(user_preferences_dict, travel_info_dict, current_user.username)
 
     # Persist for swipe phase
-    session["travel_info_dict"] = travel_info_dict
-    session["user_preferences_dict"] = user_preferences_dict
-    session["candidates"] = {
+    new_deck(user_preferences_dict, travel_info_dict, {
         "housing_ids": recs.housing_ids,
         "cuisine_ids": recs.cuisine_ids,
         "experience_ids": recs.experience_ids,
-    }
-    session["likes"] = {"housing": [], "cuisine": [], "experience": []}
-    session["dislikes"] = {"housing": [], "cuisine": [], "experience": []}
+    })
 
     return redirect(url_for("swipe"))
 
@@ -219,13 +293,39 @@ def start():
 @app.route("/swipe", methods=["GET"])
 @login_required
 def swipe():
-    candidates = session.get("candidates", {"housing_ids": [], "cuisine_ids": [], "experience_ids": []})
+    candidates = current_deck()["candidates"]
     housing_cards = [housing_id_dict[i] for i in candidates.get("housing_ids", []) if i in housing_id_dict]
     cuisine_cards = [cuisine_id_dict[i] for i in candidates.get("cuisine_ids", []) if i in cuisine_id_dict]
     experience_cards = [experience_id_dict[i] for i in candidates.get("experience_ids", []) if i in experience_id_dict]
     return render_template("swipe_interface.html", housing_cards=housing_cards, cuisine_cards=cuisine_cards, experience_cards=experience_cards)
 
 
+@app.route("/swipe/more", methods=["GET"])
+@login_required
+def swipe_more():
+    """Next page of ranked cards for one category, skipping ones already in the deck."""
+    kind = request.args.get("kind")
+    if kind not in ("housing", "cuisine", "experience"):
+        return ("bad request", 400)
+    deck = current_deck()
+    cursors = deck["cursors"]
+    candidates = deck["candidates"]
+    cards = []
+    if cursors.get(kind) is not None:
+        results, cursors[kind] = candidate_page(
+            kind,
+            deck["user_preferences_dict"],
+            deck["travel_info_dict"],
+            cursors[kind] or None,
+            taste=taste_of(current_user.username),
+            seen=seen_of(current_user.username),
+        )
+        seen = set(candidates.get(f"{kind}_ids", []))
+        cards = [r for r in results if r["id"] not in seen]
+        candidates[f"{kind}_ids"] = candidates.get(f"{kind}_ids", []) + [r["id"] for r in cards]
+    return jsonify({"success": True, "cards": cards, "finished": cursors[kind] is None})
+
+
 @app.route("/swipe/action", methods=["POST"]) 
 @login_required
 def swipe_action():
@@ -234,8 +334,10 @@ def swipe_action():
     action = request.form.get("action")  # like|dislike
     if not item_id or kind not in ("housing", "cuisine", "experience") or action not in ("like", "dislike"):
         return ("bad request", 400)
-    likes = session.get("likes", {"housing": [], "cuisine": [], "experience": []})
-    dislikes = session.get("dislikes", {"housing": [], "cuisine": [], "experience": []})
+    deck = current_deck()
+    likes, dislikes = deck["likes"], deck["dislikes"]
+    # A re-swipe only moves the card between likes and dislikes; the model already learned from it
+    redo = item_id in likes[kind] or item_id in dislikes[kind]
     if action == "like":
         if item_id not in likes[kind]:
             likes[kind].append(item_id)
@@ -246,16 +348,27 @@ def swipe_action():
             dislikes[kind].append(item_id)
         if item_id in likes[kind]:
             likes[kind].remove(item_id)
-    session["likes"] = likes
-    session["dislikes"] = dislikes
-    return ("ok", 200)
+    # Re-sort the cards not swiped yet by what this session has liked/passed so far
+    candidates = deck["candidates"]
+    ids = candidates.get(f"{kind}_ids", [])
+    decided = set(likes[kind]) | set(dislikes[kind])
+    remaining = [i for i in ids if i not in decided]
+    if not redo:
+        # Swiped cards are remembered in small batches, so they count even if the trip is never finalized
+        buffer_seen(current_user.username, deck["unsaved"], kind, item_id)
+        model = deck["session_models"].setdefault(kind, new_session_model())
+        remaining = swipe_update(model, kind, item_id, action == "like", remaining)
+        candidates[f"{kind}_ids"] = [i for i in ids if i in decided] + remaining
+    return jsonify({"success": True, "remaining": remaining})
 
 
 @app.route("/finalize", methods=["POST"]) 
 @login_required
 def finalize():
-    likes = session.get("likes", {"housing": [], "cuisine": [], "experience": []})
-    travel_info_dict = session.get("travel_info_dict", {})
+    save_swipes()
+    deck = current_deck()
+    likes = deck["likes"]
+    travel_info_dict = deck["travel_info_dict"]
 
     # Build display cards from likes
     housing_cards = [housing_id_dict[i] for i in likes.get("housing", []) if i in housing_id_dict]
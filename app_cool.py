@@ -4,9 +4,10 @@
 # 4. Presenting each option one by one and peope can swipe left or right 
 # 5. Agent that uses swipes to create a stay per day  
 
-from housing_listings import housing_listings, housing_id_dict
-from cuisine_listings import cuisine_listings, cuisine_id_dict
-from experience_listings import experience_listings, experience_id_dict
+from candidates import filter_cuisine, filter_experiences, filter_housing, shortlist  # noqa: F401  (filters kept importable from here)
+from catalog import catalog
+from personalization import taste_of, update_taste
+from seen_filter import seen_of
 from pydantic import BaseModel
 from pydantic import BaseModel, ValidationError
 from typing import List, Dict, Any, Set
@@ -19,59 +20,11 @@ class ListOut(BaseModel):
     cuisine_ids: List[str]
     experience_ids: List[str]
 
-# ===== Filters (fixed signatures & scoping) =====
-def filter_cuisine(user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
-    location = travel_info["location"]
-    cuisine_type = user_preferences["cuisine_types"]
-    return [c for c in cuisine_listings if c.get("location") == location and (c.get("cuisine_type") in cuisine_type or cuisine_type == [])]
-
-def filter_experiences(user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
-    location = travel_info["location"]
-    experience_types = user_preferences.get("experience_types", [])
-    
-    def keyword_matches(exp_keyword, search_types):
-        if not search_types:
-            return True
-        # Handle plural/singular matching
-        for search_type in search_types:
-            if exp_keyword.lower() in search_type.lower() or search_type.lower() in exp_keyword.lower():
-                return True
-            # Handle specific cases like "Museums" -> "Museum"
-            if search_type.lower().rstrip('s') == exp_keyword.lower() or exp_keyword.lower().rstrip('s') == search_type.lower():
-                return True
-        return False
-    
-    return [e for e in experience_listings if e.get("location") == location and keyword_matches(e.get("keyword", ""), experience_types)]
-
-def filter_housing(user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
-    location = travel_info["location"]
-    # Normalize location matching - handle "Boston" vs "Boston, USA"
-    location_city = location.split(',')[0].strip()
-    # dates = travel_info.get("dates", [])
-    # require all requested dates to be in scheduled_dates
-    out = []
-    for h in housing_listings:
-        h_location = h.get("location", "")
-        h_city = h_location.split(',')[0].strip()
-        if h_city != location_city:
-            continue
-        # if dates and not all(d in h.get("scheduled_dates", []) for d in dates):
-        #     continue
-        housing_types = user_preferences.get("housing_type", [])
-        if housing_types and h.get("housing_type") not in housing_types:
-            continue
-        # Match amenities from travel_info (desired_amenities)
-        desired = set(travel_info.get("desired_amenities", []))
-        if desired and not desired.intersection(set(h.get("amenities", []))):
-            continue
-        out.append(h)
-    return out
-
 # ===== Agno Agent (Claude) =====
 from agno.agent import Agent
 from agno.models.anthropic import Claude
 from tools.web_tools import search_events, get_weather
-from user_store import get_user, update_user
+from user_store import is_guest, modify_user
 from agno.tools import tool
 
 housing_agent = []
@@ -80,58 +33,52 @@ experience_agent = []
 
 @tool(show_result=True)
 def view_housing_option(housing_id : str) -> dict:
-    return housing_id_dict.get(housing_id, "No housing exists with this ID")
+    return catalog.get("housing", housing_id, "No housing exists with this ID")
 
 @tool(show_result=True)
 def view_cuisine_option(cuisine_id : str) -> dict:
-    return cuisine_id_dict.get(cuisine_id, "No cuisine exists with this ID")
+    return catalog.get("cuisine", cuisine_id, "No cuisine exists with this ID")
 
 @tool(show_result=True)
 def view_experience_option(experience_id : str) -> dict:
-    return experience_id_dict.get(experience_id, "No experience exists with this ID")
+    return catalog.get("experience", experience_id, "No experience exists with this ID")
 
 @tool(show_result=True)
 def add_housing_option(housing_option: str):
-    if housing_option in housing_id_dict:
+    if catalog.get("housing", housing_option) is not None:
         return "Housing option already exists"
     housing_agent.append(housing_option)
     return housing_agent
 
 @tool(show_result=True)
 def add_cuisine_option(cuisine_option: str):
-    if cuisine_option in cuisine_id_dict:
+    if catalog.get("cuisine", cuisine_option) is not None:
         return "Cuisine option already exists"
     cuisine_agent.append(cuisine_option)
     return cuisine_agent
 
 @tool(show_result=True)
 def add_experience_option(experience_option: str):
-    if experience_option in experience_id_dict:
+    if catalog.get("experience", experience_option) is not None:
         return "Experience option already exists"
     experience_agent.append(experience_option)
     return experience_agent
 
-def build_context(user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
-    housing_opts = filter_housing(user_preferences, travel_info)
-    cuisine_opts = filter_cuisine(user_preferences, travel_info)
-    experience_opts = filter_experiences(user_preferences, travel_info)
-    # Debug prints (IDs only)
-    print("housing_opts:", [x["id"] for x in housing_opts])
-    print("cuisine_opts:", [x["id"] for x in cuisine_opts])
-    print("experience_opts:", [x["id"] for x in experience_opts])
-
-    # Keep context compact (IDs + a few fields). The model only needs IDs to choose.
-    def slim(items, keep=("id", "location", "housing_type", "cuisine_type", "experience", "amenities", "safety")):
-        return [{k: v for k, v in item.items() if k in keep} for item in items]
+@tool(show_result=True)
+def search_listings(category: str, query: str, location: str) -> list:
+    """Full-text search of "experience" descriptions/companies or "cuisine" restaurant names in a city."""
+    if category not in ("experience", "cuisine"):
+        return []
+    store, rows, scores = catalog.search(category, location, query, k=10)
+    return [{**store.records[r], "score": round(float(s), 4)} for r, s in zip(rows, scores)]
 
-    ctx = {
-        "UserPreferences": user_preferences,
-        "TravelInfo": travel_info,
-        "HousingOptions": slim(housing_opts),
-        "CuisineOptions": slim(cuisine_opts),
-        "ExperienceOptions": slim(experience_opts),
-    }
-    return ctx, housing_opts, cuisine_opts, experience_opts
+@tool(show_result=True)
+def similar_listings(category: str, listing_id: str) -> list:
+    """Up to 10 "housing", "cuisine" or "experience" listings most like listing_id, in the same city."""
+    if category not in ("housing", "cuisine", "experience"):
+        return []
+    store, rows, dist = catalog.similar(category, listing_id, k=10)
+    return [{**store.records[r], "distance": round(float(d), 4)} for r, d in zip(rows, dist)]
 
 def coerce_to_ListOut(text: str) -> ListOut:
     """
@@ -140,20 +87,13 @@ def coerce_to_ListOut(text: str) -> ListOut:
     data = json.loads(text)
     return ListOut.model_validate(data)
 
-def ai_travel_agent_agno(user_preferences: Dict[str, Any], travel_info: Dict[str, Any]) -> ListOut:
-    context, housing_opts, cuisine_opts, experience_opts = build_context(user_preferences, travel_info)
-
-    # Shortlist to reduce hallucination space (top-N by simple preference signals)
-    def score_h(h):
-        score = 0
-        if user_preferences.get("safety_level") and h.get("safety") == user_preferences.get("safety_level"):
-            score += 2
-        desired = set(travel_info.get("desired_amenities", []))
-        score += len(desired.intersection(set(h.get("amenities", []))))
-        return score
-    housing_opts = sorted(housing_opts, key=score_h, reverse=True)[:10]
-    cuisine_opts = cuisine_opts[:10]
-    experience_opts = experience_opts[:10]
+def ai_travel_agent_agno(user_preferences: Dict[str, Any], travel_info: Dict[str, Any], username: str = None) -> ListOut:
+    # Shortlist to reduce hallucination space (top-N by weighted preference score),
+    # personalized by what a returning user liked before, minus the cards they already swiped
+    taste, seen = taste_of(username), seen_of(username)
+    housing_opts = shortlist("housing", user_preferences, travel_info, taste=taste, seen=seen)
+    cuisine_opts = shortlist("cuisine", user_preferences, travel_info, taste=taste, seen=seen)
+    experience_opts = shortlist("experience", user_preferences, travel_info, taste=taste, seen=seen)
 
     valid_h: Set[str] = {h["id"] for h in housing_opts}
     valid_c: Set[str] = {c["id"] for c in cuisine_opts}
@@ -165,7 +105,7 @@ def ai_travel_agent_agno(user_preferences: Dict[str, Any], travel_info: Dict[str
         "travel_info": {"location": "Boston, USA", "dates": ["2025-02-10"]}
     }
     example_options = {
-        "housing": [{"id": "H1", "safety": "High", "amenities": ["WiFi"]}, {"id": "H2", "safety": "Low", "amenities": []}],
+        "housing": [{"id": "H1", "safety_rating": 4.8, "amenities": ["WiFi"]}, {"id": "H2", "safety_rating": 3.6, "amenities": []}],
         "cuisine": [{"id": "C1", "cuisine_type": "Italian"}, {"id": "C2", "cuisine_type": "Chinese"}],
         "experience": [{"id": "E1", "experience": "Freedom Trail Tour"}, {"id": "E2", "experience": "Museum"}]
     }
@@ -179,9 +119,9 @@ def ai_travel_agent_agno(user_preferences: Dict[str, Any], travel_info: Dict[str
     USER = {
         "preferences": user_preferences,
         "travel_info": travel_info,
-        "housing_options": [{"id": h["id"], "safety": h.get("safety"), "amenities": h.get("amenities", [])} for h in housing_opts],
-        "cuisine_options": [{"id": c["id"], "cuisine_type": c.get("cuisine_type")} for c in cuisine_opts],
-        "experience_options": [{"id": e["id"], "experience": e.get("experience")} for e in experience_opts],
+        "housing_options": [{"id": h["id"], "safety_rating": h.get("safety_rating"), "capacity": h.get("capacity"), "amenities": h.get("amenities", []), "score": h["ranking"]["score"]} for h in housing_opts],
+        "cuisine_options": [{"id": c["id"], "cuisine_type": c.get("cuisine_type"), "score": c["ranking"]["score"]} for c in cuisine_opts],
+        "experience_options": [{"id": e["id"], "experience": e.get("experience"), "score": e["ranking"]["score"]} for e in experience_opts],
         "schema": {"housing_ids": [], "cuisine_ids": [], "experience_ids": []},
         "few_shot_example": {"input": {"user": example_user, "options": example_options}, "output": example_output},
         "tool_requirement": "Call view_housing_option, view_cuisine_option, and view_experience_option for at least 3 total items before answering.",
@@ -193,7 +133,7 @@ def ai_travel_agent_agno(user_preferences: Dict[str, Any], travel_info: Dict[str
 
     agent = Agent(model=Claude(id="claude-opus-4-1-20250805"))
     agent.output_schema = ListOut
-    agent.tools = [view_housing_option, view_cuisine_option, view_experience_option, add_housing_option, add_cuisine_option, add_experience_option]
+    agent.tools = [view_housing_option, view_cuisine_option, view_experience_option, add_housing_option, add_cuisine_option, add_experience_option, search_listings, similar_listings]
 
     try:
         raw = agent.run(json.dumps(USER), system=SYSTEM)
@@ -206,11 +146,11 @@ def ai_travel_agent_agno(user_preferences: Dict[str, Any], travel_info: Dict[str
     except Exception as e:
         print(f"[AI Agent] Failed with error: {e}")
         print("[AI Agent] Using fallback selection...")
-        # Fallback: choose top-5 from whitelists for better variety
+        # Fallback: the top-5 of each ranked shortlist
         return ListOut(
-            housing_ids=list(valid_h)[:5],
-            cuisine_ids=list(valid_c)[:5],
-            experience_ids=list(valid_e)[:5],
+            housing_ids=[h["id"] for h in housing_opts[:5]],
+            cuisine_ids=[c["id"] for c in cuisine_opts[:5]],
+            experience_ids=[e["id"] for e in experience_opts[:5]],
         )
 
     # Guardrail: keep only IDs we offered
@@ -222,11 +162,14 @@ def ai_travel_agent_agno(user_preferences: Dict[str, Any], travel_info: Dict[str
 
 def second_stage_agent(username: str, likes: Dict[str, List[str]], travel_info: Dict[str, Any]) -> Dict[str, Any]:
     """After swipes: build itinerary scaffold, packing list, events using tools, and update per-user memory state."""
-    user_record = get_user(username)
-    # Minimal state increment
-    history = user_record.get('history', [])
-    history.append({'likes': likes, 'travel_info': travel_info})
-    update_user(username, {'history': history})
+    def record(user_record):
+        # Minimal state increment, under the store lock so concurrent sessions don't drop each other's
+        user_record.setdefault('history', []).append({'likes': likes, 'travel_info': travel_info})
+        # Anonymous sessions share one record, so their likes would pool into one taste
+        if not is_guest(username):
+            user_record['taste'] = update_taste(user_record.get('taste'), likes, catalog.get)
+
+    modify_user(username, record)
 
     # Strict schema and few-shot to reduce non-JSON responses
     system = (
@@ -0,0 +1,136 @@
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+
+# Days of availability kept per listing, starting today
+HORIZON_DAYS = 730
+_WORD = 64
+_ALL = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def parse_date(value):
+    """A date from an ISO date or datetime string ("2025-10-01", "2025-10-01T15:00"), else None."""
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+def parse_spans(text):
+    """[(first, last)] inclusive date spans from "2025-10-01..2025-10-07; 2025-11-03"; bad parts are skipped."""
+    spans = []
+    for part in str(text or "").split(";"):
+        first, _, last = part.partition("..")
+        first = parse_date(first)
+        last = parse_date(last) if last else first
+        if first is not None and last is not None and first <= last:
+            spans.append((first, last))
+    return spans
+
+
+def stay_nights(dates):
+    """(first night, last night) covered by a list of trip dates, or None.
+
+    The stay runs from the earliest date up to the night before the latest
+    (the check-out day is not a night); a single date is a one-night stay.
+    """
+    days = [d for d in (parse_date(v) for v in dates or []) if d is not None]
+    if not days:
+        return None
+    first, last = min(days), max(days)
+    return first, (last - timedelta(days=1) if last > first else first)
+
+
+class AvailabilityCalendar:
+    """Per-listing day bitsets over a rolling HORIZON_DAYS window.
+
+    Day d (a date) lives in bit slot d.toordinal() % capacity of a ring of
+    uint64 words, stored word-major: words[j] holds word j of every row, so
+    checking one word across the candidates reads one contiguous column.
+    A set bit means the listing is free that night. "Free on every night of
+    a stay" is one AND per touched word against a query mask, marking a night
+    booked or free flips one bit, and rolling the window forward only resets
+    the slots of the days that enter it. Nights outside the window are not
+    constrained: past ones cannot be booked anyway and later ones are not
+    scheduled yet.
+    """
+
+    def __init__(self, n, start=None, horizon=HORIZON_DAYS):
+        self.horizon = horizon
+        self.capacity = -(-horizon // _WORD) * _WORD
+        self.words = np.full((self.capacity // _WORD, n), _ALL, dtype=np.uint64)
+        self.start = start or date.today()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spans(cls, spans, start=None, horizon=HORIZON_DAYS):
+        """Calendar where rows with spans are free only on those days; rows with none are always free."""
+        calendar = cls(len(spans), start, horizon)
+        for row, row_spans in enumerate(spans):
+            if row_spans:
+                calendar.words[:, row] = 0
+                for first, last in row_spans:
+                    calendar.set(row, first, last, free=True)
+        return calendar
+
+    def __len__(self):
+        return self.words.shape[1]
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _slots(self, first, last):
+        """Ring slots of the nights first..last (inclusive) inside the window."""
+        lo = max(first, self.start).toordinal()
+        hi = min(last.toordinal(), self.start.toordinal() + self.horizon - 1)
+        return np.arange(lo, hi + 1) % self.capacity
+
+    def mask(self, first, last):
+        """(capacity // 64,) uint64 query mask with the bits of nights first..last set."""
+        bits = np.zeros(self.capacity, dtype=bool)
+        bits[self._slots(first, last)] = True
+        return np.packbits(bits, bitorder="little").view("<u8").astype(np.uint64)
+
+    def available(self, rows, first, last):
+        """Mask over rows: free on every night first..last (inclusive)."""
+        rows = np.asarray(rows, dtype=np.intp)
+        mask = self.mask(first, last)
+        ok = np.ones(len(rows), dtype=bool)
+        for j in np.flatnonzero(mask):
+            ok &= (self.words[j][rows] & mask[j]) == mask[j]
+        return ok
+
+    def set(self, row, first, last=None, free=False):
+        """Mark nights first..last (default: just first) free or booked for one row."""
+        last = first if last is None else last
+        with self._lock:
+            for slot in self._slots(first, last):
+                word, bit = divmod(int(slot), _WORD)
+                if free:
+                    self.words[word, row] |= np.uint64(1 << bit)
+                else:
+                    self.words[word, row] &= ~np.uint64(1 << bit)
+
+    def roll(self, today=None):
+        """Move the window to start at `today`; days that enter it start out free."""
+        today = today or date.today()
+        if today <= self.start:
+            return
+        with self._lock:
+            if today <= self.start:
+                return
+            end = self.start.toordinal() + self.horizon
+            entering = np.arange(end, end + min((today - self.start).days, self.capacity)) % self.capacity
+            bits = np.zeros(self.capacity, dtype=bool)
+            bits[entering] = True
+            self.words |= np.packbits(bits, bitorder="little").view("<u8").astype(np.uint64)[:, None]
+            # Slots are free before the window covers them, so readers never see stale bookings
+            self.start = today
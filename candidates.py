@@ -0,0 +1,215 @@
+from functools import lru_cache
+from typing import Any, Dict, List
+
+import numpy as np
+
+from availability import stay_nights
+from catalog import catalog
+from collaborative import load_item_neighbors
+from experience_listings import match_keywords
+from personalization import listing_features, session_order, session_update, taste_key
+from query_cache import decode_cursor, encode_cursor, query_cache, query_signature, ranking_signature
+from ranking import explain, price_filter, rank, travelers_of
+from seen_filter import SeenFilter
+
+
+def priced_rows(store, category: str, user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
+    # Destination rows, narrowed by price range / budget through the sorted price index
+    bounds = price_filter(category, user_preferences, travel_info)
+    if bounds is None:
+        return store.candidates(travel_info["location"])
+    field, lo, hi, keep_missing = bounds
+    return store.in_range(field, travel_info["location"], lo, hi, keep_missing)
+
+
+def cuisine_rows(cuisine_store, user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
+    rows = priced_rows(cuisine_store, "cuisine", user_preferences, travel_info)
+    cuisine_type = user_preferences.get("cuisine_types", [])
+    if cuisine_type:
+        rows = rows[cuisine_store.isin("cuisine_type", cuisine_type, rows)]
+    return rows
+
+
+def filter_cuisine(user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
+    cuisine_store, rows = candidate_rows("cuisine", user_preferences, travel_info)
+    return cuisine_store.take(rows)
+
+
+def experience_keywords(experience_store, experience_types):
+    # Synonym/plural table over the keyword vocabulary, e.g. "Museums" / "Galleries" -> "Museum"
+    return match_keywords(experience_store.categorical["keyword"].categories, experience_types)
+
+
+def experience_rows(experience_store, user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
+    rows = priced_rows(experience_store, "experience", user_preferences, travel_info)
+    experience_types = user_preferences.get("experience_types", [])
+    if experience_types:
+        # Union of the matched keywords' posting lists, within the destination rows
+        matched = experience_store.rows_with("keyword", experience_keywords(experience_store, experience_types))
+        rows = np.intersect1d(rows, matched, assume_unique=True)
+    return rows
+
+
+def filter_experiences(user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
+    experience_store, rows = candidate_rows("experience", user_preferences, travel_info)
+    return experience_store.take(rows)
+
+
+def housing_rows(housing_store, user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
+    # Location index handles "Boston" vs "Boston, USA"
+    rows = priced_rows(housing_store, "housing", user_preferences, travel_info)
+    # Sleeps the whole group; listings of unknown capacity cannot be ruled out
+    travelers = travelers_of(travel_info)
+    if travelers > 1:
+        rows = rows[~(housing_store.numeric["capacity"][rows] < travelers)]
+    # Free on every night of the stay: one AND per row against the availability bitsets
+    stay = stay_nights(travel_info.get("dates"))
+    if stay is not None and housing_store.availability is not None:
+        rows = rows[housing_store.availability.available(rows, *stay)]
+    housing_types = user_preferences.get("housing_type", [])
+    if housing_types:
+        rows = rows[housing_store.isin("housing_type", housing_types, rows)]
+    # Match amenities from travel_info (desired_amenities)
+    desired = travel_info.get("desired_amenities", [])
+    if desired:
+        rows = rows[housing_store.has_any("amenities", desired, rows)]
+    return rows
+
+
+def filter_housing(user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
+    housing_store, rows = candidate_rows("housing", user_preferences, travel_info)
+    return housing_store.take(rows)
+
+
+CANDIDATE_ROWS = {"housing": housing_rows, "cuisine": cuisine_rows, "experience": experience_rows}
+
+
+def _candidates(category: str, user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
+    # (store, filtered rows, catalog version they belong to)
+    store, version = catalog.city_store_version(category, travel_info["location"])
+    rows = query_cache.get(
+        "rows", category, query_signature(category, user_preferences, travel_info), version,
+        lambda: CANDIDATE_ROWS[category](store, user_preferences, travel_info),
+    )
+    return store, rows, version
+
+
+def candidate_rows(category: str, user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
+    """(store, filtered rows) for a query, memoized per catalog version."""
+    store, rows, _ = _candidates(category, user_preferences, travel_info)
+    return store, rows
+
+
+# Preferences and trip fields that must be lists of strings when given
+LIST_PREFERENCES = ("housing_type", "preferred_amenities", "cuisine_types", "experience_types")
+LIST_TRAVEL_INFO = ("dates", "desired_amenities")
+
+
+def check_query(user_preferences: Dict[str, Any], travel_info: Dict[str, Any]):
+    """Raise ValueError for a malformed query from outside (e.g. the paging APIs)."""
+    if not travel_info.get("location"):
+        raise ValueError("travel_info needs a location")
+    for name, values, fields in (
+        ("user_preferences", user_preferences, LIST_PREFERENCES),
+        ("travel_info", travel_info, LIST_TRAVEL_INFO),
+    ):
+        for field in fields:
+            value = values.get(field)
+            if value is not None and not (isinstance(value, list) and all(isinstance(v, str) for v in value)):
+                raise ValueError(f"{name}.{field} must be a list of strings")
+
+
+# Ranked prefixes are cached at power-of-two depths, so paging deeper re-ranks only now and then
+MIN_RANK_DEPTH = 16
+PAGE_SIZE = 10
+# Largest page a caller may ask for; bigger limits are cut to it
+MAX_PAGE_SIZE = 100
+
+
+def ranked(category: str, user_preferences: Dict[str, Any], travel_info: Dict[str, Any], k: int = 10, taste: Dict[str, Any] = None):
+    """(store, rows, scores, contributions) for the best k filtered listings, memoized per catalog version.
+
+    `taste` is the user's learned taste vector (personalization.taste_of), if any.
+    """
+    store, rows, version = _candidates(category, user_preferences, travel_info)
+
+    def compute():
+        keywords = None
+        if category == "cuisine" and user_preferences.get("cuisine_types"):
+            keywords = user_preferences.get("cuisine_types", [])
+        elif category == "experience" and user_preferences.get("experience_types"):
+            keywords = experience_keywords(store, user_preferences.get("experience_types", []))
+        return rank(store, category, rows, user_preferences, travel_info, k=k, keywords=keywords, taste=taste)
+
+    # The neighbour table's stamp drops cached rankings when the offline job rewrites it
+    signature = ranking_signature(category, user_preferences, travel_info) + (
+        k, taste_key(taste, category), load_item_neighbors()[0],
+    )
+    top, scores, contributions = query_cache.get("ranked", category, signature, version, compute)
+    return store, top, scores, contributions
+
+
+def shortlist(category: str, user_preferences: Dict[str, Any], travel_info: Dict[str, Any], k: int = 10, taste: Dict[str, Any] = None, seen: SeenFilter = None):
+    """Top-k filtered listings of a category, each with its score breakdown under "ranking".
+
+    Listings in `seen` (the user's seen_filter.SeenFilter, if any) are
+    skipped, ranking deeper as needed to still return k.
+    """
+    depth = k
+    while True:
+        store, top, scores, contributions = ranked(category, user_preferences, travel_info, depth, taste)
+        keep = np.arange(len(top))
+        if seen is not None and len(top):
+            keep = keep[~seen.contains(category, [store.listing_id(r) for r in top])]
+        if len(keep) >= k or len(top) < depth:
+            break
+        depth *= 2
+    return [{**store.records[top[i]], "ranking": explain(scores, contributions, i)} for i in keep[:k]]
+
+
+def candidate_page(category: str, user_preferences: Dict[str, Any], travel_info: Dict[str, Any], cursor: str = None, limit: int = PAGE_SIZE, taste: Dict[str, Any] = None, seen: SeenFilter = None):
+    """One page of the ranked candidates and the cursor for the next page (None after the last).
+
+    The cursor encodes the query signature and an offset, so later pages of
+    the same query reuse the cached filter and ranking. Listings in `seen`
+    are skipped without shifting the offsets; `limit` is clamped to
+    1..MAX_PAGE_SIZE. Raises ValueError for a
+    malformed query or a cursor issued for a different query.
+    """
+    check_query(user_preferences, travel_info)
+    signature = ranking_signature(category, user_preferences, travel_info)
+    offset = decode_cursor(cursor, signature) if cursor else 0
+    limit = min(max(int(limit), 1), MAX_PAGE_SIZE)
+    _, rows = candidate_rows(category, user_preferences, travel_info)
+    items = []
+    depth = MIN_RANK_DEPTH
+    while len(items) < limit and offset < len(rows):
+        while depth < offset + limit - len(items):
+            depth *= 2
+        store, top, scores, contributions = ranked(category, user_preferences, travel_info, depth, taste)
+        positions = np.arange(offset, len(top))
+        if seen is not None and len(positions):
+            positions = positions[~seen.contains(category, [store.listing_id(top[i]) for i in positions])]
+        positions = positions[:limit - len(items)]
+        items += [{**store.records[top[i]], "ranking": explain(scores, contributions, i)} for i in positions]
+        offset = positions[-1] + 1 if len(items) == limit else len(top)
+        depth *= 2
+    return items, (encode_cursor(signature, int(offset)) if offset < len(rows) else None)
+
+
+@lru_cache(maxsize=65536)
+def _card_features(category: str, listing_id: str, version: int):
+    # Taste features of one listing, cached per catalog version
+    return tuple(listing_features(category, catalog.get(category, listing_id) or {}))
+
+
+def swipe_update(model: Dict[str, Any], category: str, listing_id: str, liked: bool, remaining: List[str]) -> List[str]:
+    """Learn from one swipe and return the cards not yet shown, best first.
+
+    `model` is the session's personalization.new_session_model() for this
+    category and is updated in place; the step and the re-sort only touch
+    the swiped card's and the remaining cards' features.
+    """
+    version = catalog.version(category)
+    session_update(model, _card_features(category, listing_id, version), liked)
+    return session_order(model, list(remaining), lambda i: _card_features(category, i, version))
@@ -0,0 +1,356 @@
+import os
+import threading
+import time
+from collections.abc import Mapping
+from datetime import date, timedelta
+
+import numpy as np
+
+import cuisine_listings
+import experience_listings
+import geo
+import housing_listings
+from listing_store import city_key
+from partitions import PartitionCache, load_partitions
+
+
+# category -> (find the source file, build a ColumnStore from it, build one from listing dicts)
+CATEGORIES = {
+    "housing": (housing_listings.find_source, housing_listings.load_housing_store, housing_listings.build_housing_store),
+    "cuisine": (cuisine_listings.find_source, cuisine_listings.load_cuisine_store, cuisine_listings.build_cuisine_store),
+    "experience": (experience_listings.find_source, experience_listings.load_experience_store, experience_listings.build_experience_store),
+}
+MEMORY_BUDGET_MB = float(os.getenv("CATALOG_MEMORY_BUDGET_MB", "256"))
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class _Loaded:
+    __slots__ = ("value", "path", "stamp", "checked")
+
+    def __init__(self, value, path, stamp):
+        self.value = value
+        self.path = path
+        self.stamp = stamp
+        self.checked = time.monotonic()
+
+
+class _IdView(Mapping):
+    """Read-only id -> listing mapping that always reads the current catalog."""
+
+    def __init__(self, catalog, category):
+        self._catalog = catalog
+        self._category = category
+
+    def __getitem__(self, listing_id):
+        listing = self._catalog.get(self._category, listing_id)
+        if listing is None:
+            raise KeyError(listing_id)
+        return listing
+
+    def __iter__(self):
+        return iter(self._catalog.id_index(self._category))
+
+    def __len__(self):
+        return len(self._catalog.id_index(self._category))
+
+
+class Catalog:
+    """Lazily loaded, hot-reloadable housing/cuisine/experience catalogs.
+
+    Two views of each category are available. `store(category)` is the full
+    ColumnStore. `city_store(category, location)` is the per-city partition,
+    loaded from disk on first use and kept in an LRU bounded by
+    `memory_budget_mb`; id lookups also go through partitions when
+    `partitioned` is set, so a worker only holds the cities it serves.
+
+    Everything is built on first access. After that, at most every
+    `check_interval` seconds an access re-stats the source CSV; if it changed,
+    the affected view is rebuilt and swapped in with one assignment, so
+    readers see either the old or the new catalog, never a mix. Each change
+    bumps the category's version. `watch()` does the same checks from a
+    daemon thread so requests never pay for a rebuild.
+
+    Availability changes made through `set_available` are kept in a
+    per-category journal and replayed onto partitions loaded later, so they
+    survive LRU eviction until the source itself changes. Calendars are
+    rolled forward to today when loaded and by `watch()` (see `roll`), so
+    the query path only reads them.
+    """
+
+    def __init__(self, categories=None, check_interval=2.0, memory_budget_mb=MEMORY_BUDGET_MB, partitioned=True):
+        self.categories = dict(categories or CATEGORIES)
+        self.check_interval = check_interval
+        self.partitioned = partitioned
+        self.partitions = PartitionCache(int(memory_budget_mb * 1024 * 1024))
+        self._loaded = {}
+        self._stamps = {}
+        self._versions = {}
+        self._availability = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def _build(self, key):
+        category, kind = key
+        find_source, load_store, build_store = self.categories[category]
+        path = find_source()
+        stamp = _stamp(path) if path else None
+        if kind == "partitions":
+            value = load_partitions(category, path, load_store, build_store) if path else None
+        else:
+            value = load_store(path)
+            if value.availability is not None:
+                value.availability.roll()
+        # Stamps are kept per view: a view built from a source that differs
+        # from what either view last loaded bumps the version, so the other,
+        # still-stale view is not served under the new version and its own
+        # rebuild later bumps it again
+        if any(seen != stamp for view, seen in self._stamps.items() if view[0] == category):
+            self._versions[category] = self._versions.get(category, 1) + 1
+            self._availability.pop(category, None)
+        elif kind == "full":
+            self._replay(category, value)
+        self._stamps[key] = stamp
+        self._versions.setdefault(category, 1)
+        old = self._loaded.get(key)
+        self._loaded[key] = _Loaded(value, path, stamp)
+        if old is not None and kind == "partitions" and old.value is not None:
+            self.partitions.discard(lambda k: k[0] == old.value.root)
+        return self._loaded[key]
+
+    def _entry(self, key):
+        loaded = self._loaded.get(key)
+        if loaded is None:
+            with self._lock:
+                loaded = self._loaded.get(key)
+                if loaded is None:
+                    loaded = self._build(key)
+        elif time.monotonic() - loaded.checked >= self.check_interval:
+            loaded = self._refresh(key, loaded)
+        return loaded
+
+    def _refresh(self, key, loaded):
+        with self._lock:
+            current = self._loaded.get(key, loaded)
+            current.checked = time.monotonic()
+            path = self.categories[key[0]][0]()
+            if path == current.path and (not path or _stamp(path) == current.stamp):
+                return current
+            return self._build(key)
+
+    def refresh(self, category=None):
+        """Reload any loaded view whose source changed; returns the reloaded categories."""
+        reloaded = []
+        for key in list(self._loaded):
+            if category and key[0] != category:
+                continue
+            loaded = self._loaded[key]
+            if self._refresh(key, loaded) is not loaded and key[0] not in reloaded:
+                reloaded.append(key[0])
+        return reloaded
+
+    def watch(self, interval=None):
+        if self._watcher is not None:
+            return self._watcher
+        interval = interval or self.check_interval
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                    self.roll()
+                except Exception as e:
+                    print(f"[Catalog] refresh failed: {e}")
+
+        self._watcher = threading.Thread(target=loop, name="catalog-watcher", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def store(self, category):
+        return self._entry((category, "full")).value
+
+    def version(self, category):
+        if not any(key[0] == category for key in self._loaded):
+            self._entry((category, "partitions" if self.partitioned else "full"))
+        return self._versions[category]
+
+    def listings(self, category):
+        return self.store(category).records
+
+    def _partition_index(self, category):
+        return self._entry((category, "partitions")).value
+
+    def _partition(self, category, index, code):
+        return self.partitions.get(
+            (index.root, code), lambda: self._load_partition(category, index, code), size=index.nbytes[code]
+        )
+
+    def _load_partition(self, category, index, code):
+        store = index.load(code)
+        if store.availability is not None:
+            store.availability.roll()
+        with self._lock:
+            return self._replay(category, store)
+
+    def _replay(self, category, store):
+        """Apply journaled availability changes to a freshly loaded store (call with _lock held)."""
+        if store.availability is not None:
+            for listing_id, nights in self._availability.get(category, {}).items():
+                row = store.row(listing_id)
+                if row is not None:
+                    for night, free in nights.items():
+                        store.availability.set(row, night, night, free)
+        return store
+
+    def set_available(self, category, listing_id, first, last=None, free=False):
+        """Mark listing_id free or booked for nights first..last (dates); False if it has no calendar.
+
+        Bumps the category's version, so cached query results are recomputed.
+        """
+        store, row = self._owner(category, listing_id)
+        if store is None or store.availability is None:
+            return False
+        calendar = store.availability
+        last = first if last is None else last
+        with self._lock:
+            # Bits first and the version last, so nothing cached under the new
+            # version can have been computed from the old bits
+            calendar.set(row, first, last, free)
+            full = self._loaded.get((category, "full"))
+            if full is not None and full.value is not store and full.value.availability is not None:
+                full_row = full.value.row(listing_id)
+                if full_row is not None:
+                    full.value.availability.set(full_row, first, last, free)
+            # One entry per night, and none for nights the window has left
+            nights = self._availability.setdefault(category, {}).setdefault(listing_id, {})
+            for night in [n for n in nights if n < calendar.start]:
+                del nights[night]
+            night = max(first, calendar.start)
+            end = min(last, calendar.start + timedelta(days=calendar.horizon - 1))
+            while night <= end:
+                nights[night] = free
+                night += timedelta(days=1)
+            self._versions[category] = self._versions.get(category, 1) + 1
+        return True
+
+    def roll(self, today=None):
+        """Move every loaded availability calendar's window to start at `today`; returns the categories rolled.
+
+        Rolled categories drop their journaled nights before `today` and bump
+        their version, after the bits change, like set_available.
+        """
+        today = today or date.today()
+        roots = {loaded.value.root: key[0] for key, loaded in list(self._loaded.items())
+                 if key[1] == "partitions" and loaded.value is not None}
+        stores = [(key[0], loaded.value) for key, loaded in list(self._loaded.items()) if key[1] == "full"]
+        stores += [(roots[key[0]], store) for key, store in self.partitions.items() if key[0] in roots]
+        rolled = []
+        with self._lock:
+            for category, store in stores:
+                if store.availability is not None and store.availability.start < today:
+                    store.availability.roll(today)
+                    if category not in rolled:
+                        rolled.append(category)
+            for category in rolled:
+                for nights in self._availability.get(category, {}).values():
+                    for night in [n for n in nights if n < today]:
+                        del nights[night]
+                self._versions[category] = self._versions.get(category, 1) + 1
+        return rolled
+
+    def city_store(self, category, location):
+        """The partition holding `location`'s listings (an empty store for unknown cities)."""
+        if not self.partitioned:
+            return self.store(category)
+        index = self._partition_index(category)
+        if index is None:
+            return self.store(category)
+        code = index.city_code(city_key(location))
+        if code is None:
+            return index.empty
+        return self._partition(category, index, code)
+
+    def city_store_version(self, category, location):
+        """(city_store, version) read together, so the store is never paired with a newer version.
+
+        Reloads bump the version before publishing the new store, so if the
+        version is unchanged around fetching the store, the store is that
+        version's; otherwise the pair is read again.
+        """
+        while True:
+            version = self.version(category)
+            store = self.city_store(category, location)
+            if self.version(category) == version:
+                return store, version
+
+    def _owner(self, category, listing_id):
+        """(store, row) holding listing_id, or (None, None)."""
+        index = self._partition_index(category) if self.partitioned else None
+        if index is None:
+            store = self.store(category)
+        else:
+            code = index.city_of(listing_id)
+            if code is None:
+                return None, None
+            store = self._partition(category, index, code)
+        row = store.row(listing_id)
+        return (store, row) if row is not None else (None, None)
+
+    def get(self, category, listing_id, default=None):
+        store, row = self._owner(category, listing_id)
+        return default if store is None else store.records[row]
+
+    def points(self, category, listing_ids):
+        """(lat, lon) of each known, geocoded listing id."""
+        points = []
+        for listing_id in listing_ids:
+            store, row = self._owner(category, listing_id)
+            if store is not None:
+                points += geo.points_of(store, [row])
+        return points
+
+    def near(self, category, location, points, km):
+        """(store, rows, distance_km) of `location`'s listings within km of any point."""
+        store = self.city_store(category, location)
+        rows, dist = geo.near(store, points, km)
+        return store, rows, dist
+
+    def search(self, category, location, query, k=10):
+        """(store, rows, scores): BM25 matches for `query` among `location`'s listings."""
+        store = self.city_store(category, location)
+        if store.text_index is None:
+            return store, np.empty(0, dtype=np.int64), np.empty(0)
+        # A city partition holds only that city; the full store needs restricting
+        within = store.candidates(location) if len(store.by_city) > 1 else None
+        rows, scores = store.text_index.search(query, k, rows=within)
+        return store, rows, scores
+
+    def similar(self, category, listing_id, k=10):
+        """(store, rows, distances) of the k listings most like listing_id in its city."""
+        store, row = self._owner(category, listing_id)
+        if store is None or store.similarity is None:
+            return store, np.empty(0, dtype=np.intp), np.empty(0)
+        # A city partition holds only that city; the full store needs restricting
+        within = store.candidates(store.records[row]["location"]) if len(store.by_city) > 1 else None
+        rows, dist = store.similarity.similar(row, k, rows=within)
+        return store, rows, dist
+
+    def id_index(self, category):
+        index = self._partition_index(category) if self.partitioned else None
+        return index.rows if index is not None else self.store(category).rows
+
+    def id_view(self, category):
+        return _IdView(self, category)
+
+    def stats(self):
+        return {"partitions": self.partitions.stats(), "versions": dict(self._versions)}
+
+
+catalog = Catalog()
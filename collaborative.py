@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from user_store import is_guest
+
+
+# Written offline by tools/build_item_neighbors.py from the likes in user_store.json
+ITEM_NEIGHBORS_PATH = os.getenv(
+    "ITEM_NEIGHBORS_PATH", os.path.join(os.path.dirname(__file__), "item_neighbors.json")
+)
+# Neighbours kept per item
+TOP_NEIGHBORS = 20
+# Co-likes needed before a pair's cosine counts fully (pairs seen once are damped)
+SHRINK = 2.0
+
+
+def liked_sets(users):
+    """user -> set of liked listing ids across all of a user_store record's history.
+
+    The shared guest account is not one user's taste and is left out.
+    """
+    out = {}
+    for key, user in users.items():
+        if is_guest(key):
+            continue
+        liked = set()
+        for session in user.get("history") or []:
+            for ids in (session.get("likes") or {}).values():
+                liked.update(i for i in ids or [] if i)
+        if liked:
+            out[key] = liked
+    return out
+
+
+def item_neighbors(liked, top=TOP_NEIGHBORS, shrink=SHRINK):
+    """{item: [[neighbour, score], ...]} from item-item co-likes, best first.
+
+    Builds the sparse user x item matrix X, takes the co-like counts X'X and
+    scores each pair by cosine similarity damped by count / (count + shrink).
+    Neighbours may be of any category, so a liked stay can lift restaurants.
+    """
+    from scipy import sparse
+
+    items = sorted({i for ids in liked.values() for i in ids})
+    if not items:
+        return {}
+    column = {item: c for c, item in enumerate(items)}
+    user_rows, item_cols = [], []
+    for u, ids in enumerate(liked.values()):
+        user_rows += [u] * len(ids)
+        item_cols += [column[i] for i in ids]
+    x = sparse.csr_matrix(
+        (np.ones(len(item_cols), dtype=np.float32), (user_rows, item_cols)), shape=(len(liked), len(items))
+    )
+    co = (x.T @ x).tocsr()
+    degree = co.diagonal()
+    co.setdiag(0)
+    co.eliminate_zeros()
+    table = {}
+    for i in range(len(items)):
+        start, end = co.indptr[i], co.indptr[i + 1]
+        cols, counts = co.indices[start:end], co.data[start:end]
+        if not len(cols):
+            continue
+        scores = counts / np.sqrt(degree[i] * degree[cols]) * counts / (counts + shrink)
+        best = np.lexsort((cols, -scores))[:top]
+        table[items[i]] = [[items[cols[j]], round(float(scores[j]), 4)] for j in best]
+    return table
+
+
+def write_item_neighbors(table, path=ITEM_NEIGHBORS_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"neighbors": table}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def load_item_neighbors(path=ITEM_NEIGHBORS_PATH):
+    """(stamp, table) for the current neighbour file, re-read only when it changes; ({} if missing)."""
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None, {}
+    with _lock:
+        cached = _loaded.get(path)
+        if cached is None or cached[0] != stamp:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    table = json.load(f).get("neighbors") or {}
+            except (OSError, ValueError):
+                table = {}
+            cached = _loaded[path] = (stamp, table)
+    return cached
+
+
+def co_liked(store, rows, liked, table=None):
+    """Per-row score in [0, 1] from the neighbours of the user's liked items, or None.
+
+    Each liked item's neighbour list is one dict lookup; the summed scores
+    are then scattered onto the candidate rows that have any.
+    """
+    if not len(rows):
+        return None
+    if table is None:
+        table = load_item_neighbors()[1]
+    totals = {}
+    for item in liked or ():
+        for neighbor, score in table.get(item, ()):
+            totals[neighbor] = totals.get(neighbor, 0.0) + score
+    hits = [(store.row(item), score) for item, score in totals.items() if item not in liked]
+    hits = [(row, score) for row, score in hits if row is not None]
+    if not hits:
+        return None
+    hit_rows = np.array([row for row, _ in hits], dtype=np.intp)
+    hit_scores = np.array([score for _, score in hits])
+    order = np.argsort(rows, kind="stable")
+    at = np.minimum(np.searchsorted(rows[order], hit_rows), len(rows) - 1)
+    found = rows[order][at] == hit_rows
+    out = np.zeros(len(rows))
+    out[order[at[found]]] = hit_scores[found]
+    best = out.max() if len(out) else 0.0
+    return out / best if best > 0 else None
@@ -0,0 +1,54 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+
+META_FILE = "meta.json"
+
+
+def write_shard(path, columns, vocabularies=None):
+    """Write one shard as a directory of .npy columns plus meta.json.
+
+    Columns must be plain (non-object) arrays so readers can memory-map them;
+    categorical columns are integer codes into `vocabularies[name]`.
+    """
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    rows = None
+    for name, values in columns.items():
+        values = np.asarray(values)
+        if values.dtype == object:
+            raise ValueError(f"column {name!r} has object dtype; encode it first")
+        rows = len(values) if rows is None else rows
+        if len(values) != rows:
+            raise ValueError(f"column {name!r} has {len(values)} rows, expected {rows}")
+        np.save(os.path.join(tmp_path, name + ".npy"), values)
+    meta = {
+        "rows": rows or 0,
+        "columns": {name: str(np.asarray(v).dtype) for name, v in columns.items()},
+        "vocabularies": vocabularies or {},
+    }
+    with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def read_shard(path, mmap=True):
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    mode = "r" if mmap else None
+    columns = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mode) for name in meta["columns"]}
+    return columns, meta
+
+
+def list_shards(root):
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        os.path.join(root, name) for name in os.listdir(root)
+        if os.path.isfile(os.path.join(root, name, META_FILE))
+    )
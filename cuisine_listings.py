@@ -1,6 +1,15 @@
-import csv
 import os
 
+import numpy as np
+
+import geo
+from ingest import ShardRecords, concat_categorical, concat_numeric, encode, load_shards, numbers, open_shards, scalar, text
+from listing_store import ColumnStore, DenseIds
+from similarity import build_similarity
+from snapshot import load_snapshot
+from text_search import index_text, join_text
+from tfidf import build_tfidf
+
 
 def _find_restaurants_csv(base_dir):
     for name in os.listdir(base_dir):
@@ -10,8 +19,13 @@ def _find_restaurants_csv(base_dir):
     return ""
 
 
-def _normalize_location(default_city="Boston", default_country="USA"):
-    return f"{default_city}, {default_country}"
+def _normalize_location(city_location="", country="", default_city="Boston", default_country="USA"):
+    # The original export has no location columns: everything is in Boston
+    city = city_location.split(',')[0].strip() if city_location else ""
+    country_norm = country.strip() if country else ""
+    if country_norm.lower() in {"united states", "usa", "u.s.a.", "us", "u.s."}:
+        country_norm = "USA"
+    return f"{city or default_city}, {country_norm or default_country}"
 
 
 def _price_bucket(min_price, max_price):
@@ -39,42 +53,126 @@ def _price_bucket(min_price, max_price):
     return 'ultra high'
 
 
-def _load_cuisines_from_csv():
-    base_dir = os.path.dirname(__file__)
-    csv_path = _find_restaurants_csv(base_dir)
-    results = []
-    if not csv_path:
-        return results
-
-    with open(csv_path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        idx = 1
-        for row in reader:
-            # Restaurant name: first column is unnamed in provided CSV
-            name = (row.get('') or row.get('Name') or row.get('Restaurant') or '').strip()
-            cuisine_type = row.get('Cuisine Type', '').strip() or 'Unknown'
-            min_price = row.get('Min Price ($)', '')
-            max_price = row.get('Max Price ($)', '')
-            pricing = _price_bucket(min_price, max_price)
-            results.append({
-                'id': f"C{idx}",
-                'location': _normalize_location(),
-                'name': name or cuisine_type,
-                'cuisine_type': cuisine_type,
-                'pricing': pricing,
-            })
-            idx += 1
-    return results
-
-
-cuisine_listings = _load_cuisines_from_csv()
-
-if not cuisine_listings:
-    cuisine_listings = [
-        {"id": "C1", "location": "Boston, USA", "cuisine_type": "American", "pricing": "medium"},
-        {"id": "C2", "location": "Boston, USA", "cuisine_type": "Italian", "pricing": "medium"},
-        {"id": "C3", "location": "Boston, USA", "cuisine_type": "Chinese", "pricing": "low"},
-    ]
-
-
-cuisine_id_dict = {a['id']: a for a in cuisine_listings}
\ No newline at end of file
+def find_source():
+    return _find_restaurants_csv(os.path.dirname(__file__) or ".")
+
+
+def _price_buckets(min_prices, max_prices):
+    """Vectorized _price_bucket over whole columns of raw CSV strings."""
+    lo_raw = np.asarray(min_prices, dtype=object)
+    hi_raw = np.asarray(max_prices, dtype=object)
+    lo = numbers(lo_raw)
+    hi = numbers(hi_raw)
+    avg = np.where(np.isnan(lo), hi, np.where(np.isnan(hi), lo, (lo + hi) / 2.0))
+    buckets = np.select([avg <= 20, avg <= 50, avg <= 90, avg > 90], ['low', 'medium', 'high', 'ultra high'], 'medium')
+    # Any non-empty price that does not parse makes the whole row 'medium'
+    unparsable = ((lo_raw != '') & np.isnan(lo)) | ((hi_raw != '') & np.isnan(hi))
+    buckets[unparsable] = 'medium'
+    return buckets, lo, hi
+
+
+def _column(df, name):
+    if name in df:
+        return df[name].to_numpy(dtype=object)
+    return np.full(len(df), '', dtype=object)
+
+
+def _normalize_chunk(df, start):
+    # Restaurant name: first column is unnamed in provided CSV
+    name = np.full(len(df), '', dtype=object)
+    for col in ('Unnamed: 0', 'Name', 'Restaurant'):
+        name = np.where(name == '', _column(df, col), name)
+    name = np.char.strip(name.astype(str))
+    cuisine_type = np.char.strip(_column(df, 'Cuisine Type').astype(str))
+    cuisine_type = np.where(cuisine_type == '', 'Unknown', cuisine_type)
+    pricing, min_price, max_price = _price_buckets(_column(df, 'Min Price ($)'), _column(df, 'Max Price ($)'))
+    pairs = list(zip(_column(df, 'City Location'), _column(df, 'Country')))
+    normalized = {pair: _normalize_location(*pair) for pair in set(pairs)}
+    location = np.array([normalized[pair] for pair in pairs], dtype=object)
+
+    columns = {'id': np.arange(start + 1, start + len(df) + 1, dtype=np.int64)}
+    vocabularies = {}
+    for field, values in (('location', location), ('cuisine_type', cuisine_type), ('pricing', pricing)):
+        columns[field], vocabularies[field] = encode(values)
+    columns['name'] = text(np.where(name == '', cuisine_type, name))
+    columns['min_price'] = min_price
+    columns['max_price'] = max_price
+    columns['lat'], columns['lon'] = geo.coordinates(location, columns['name'])
+    return columns, vocabularies
+
+
+def _make_record(columns, vocabularies, i):
+    return {
+        'id': f"C{columns['id'][i]}",
+        'location': vocabularies['location'][columns['location'][i]],
+        'name': str(columns['name'][i]),
+        'cuisine_type': vocabularies['cuisine_type'][columns['cuisine_type'][i]],
+        'pricing': vocabularies['pricing'][columns['pricing'][i]],
+        'min_price': scalar(columns['min_price'][i]),
+        'max_price': scalar(columns['max_price'][i]),
+    }
+
+
+FALLBACK_CUISINES = [
+    {"id": "C1", "location": "Boston, USA", "cuisine_type": "American", "pricing": "medium"},
+    {"id": "C2", "location": "Boston, USA", "cuisine_type": "Italian", "pricing": "medium"},
+    {"id": "C3", "location": "Boston, USA", "cuisine_type": "Chinese", "pricing": "low"},
+]
+
+
+def _tfidf_texts(shards):
+    return np.concatenate([
+        join_text(columns["name"], np.asarray(meta["vocabularies"]["cuisine_type"], dtype=str)[columns["cuisine_type"]])
+        for columns, meta in shards
+    ])
+
+
+def build_cuisine_store(listings):
+    store = ColumnStore(listings, numeric=("min_price", "max_price"), categorical=("cuisine_type", "pricing"))
+    store.index_sorted("min_price")
+    names = join_text([c.get("name") for c in listings])
+    index_text(store, [(0, names)])
+    store.tfidf = build_tfidf(join_text(names, [c.get("cuisine_type") for c in listings]))
+    geo.attach_coordinates(store, *geo.coordinates(
+        [c.get("location") for c in listings], [c.get("name") for c in listings]
+    ))
+    store.similarity = build_similarity(store, "cuisine")
+    return store
+
+
+def load_cuisine_store(csv_path=""):
+    """Memory-mapped store over the ingested restaurants CSV (re-ingested when it changes)."""
+    if not csv_path or not os.path.exists(csv_path):
+        return build_cuisine_store(FALLBACK_CUISINES)
+    shards = open_shards(load_shards(csv_path, "cuisine", _normalize_chunk, version=4))
+    records = ShardRecords(shards, _make_record)
+    if not len(records):
+        return build_cuisine_store(FALLBACK_CUISINES)
+    store = ColumnStore.from_columns(
+        records,
+        DenseIds("C", len(records)),
+        concat_categorical(shards, "location"),
+        numeric={"min_price": concat_numeric(shards, "min_price"), "max_price": concat_numeric(shards, "max_price")},
+        categorical={
+            "cuisine_type": concat_categorical(shards, "cuisine_type"),
+            "pricing": concat_categorical(shards, "pricing"),
+        },
+    )
+    store.index_sorted("min_price")
+    index_text(store, ((start, columns["name"]) for start, (columns, _) in zip(records.offsets, shards)))
+    store.tfidf = load_snapshot(csv_path, lambda path: build_tfidf(_tfidf_texts(shards)), name="cuisine.tfidf")
+    geo.attach_coordinates(store, concat_numeric(shards, "lat"), concat_numeric(shards, "lon"))
+    store.similarity = load_snapshot(csv_path, lambda path: build_similarity(store, "cuisine"), name="cuisine.similarity")
+    return store
+
+
+def __getattr__(name):
+    # Legacy module globals, served lazily from the shared catalog
+    from catalog import catalog
+    if name == "cuisine_store":
+        return catalog.store("cuisine")
+    if name == "cuisine_listings":
+        return catalog.listings("cuisine")
+    if name == "cuisine_id_dict":
+        return catalog.id_view("cuisine")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
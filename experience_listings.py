@@ -1,11 +1,23 @@
-import csv
 import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+import geo
+from ingest import ShardRecords, concat_categorical, concat_numeric, encode, load_shards, numbers, open_shards, scalar, text
+from listing_store import ColumnStore, DenseIds
+from similarity import build_similarity
+from snapshot import load_snapshot
+from text_search import index_text, join_text
+from tfidf import build_tfidf
 
 
 def _find_experiences_csv(base_dir):
     for name in os.listdir(base_dir):
         lower = name.lower()
-        if lower.endswith('.csv') and 'experience' in lower:
+        # The restaurants export's name also mentions "experiences"
+        if lower.endswith('.csv') and 'experience' in lower and 'restaurant' not in lower:
             return os.path.join(base_dir, name)
     return ""
 
@@ -58,47 +70,186 @@ def _categorize_keyword(text: str) -> str:
     return "Sightseeing"
 
 
-def _load_experiences_from_csv():
-    base_dir = os.path.dirname(__file__)
-    csv_path = _find_experiences_csv(base_dir)
-    results = []
-    if not csv_path:
-        return results
-
-    with open(csv_path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        idx = 1
-        for row in reader:
-            location = _normalize_location(row.get('City Location', ''), row.get('Country', ''))
-            title = row.get('Experience Description') or row.get('Company Name') or 'Experience'
-            pricing = _price_bucket(row.get('Cost ($)', ''))
-            keyword = (row.get('Keyword') or '').strip()
-            if not keyword:
-                # Compute keyword if CSV lacks it
-                keyword = _categorize_keyword(title or row.get('Company Name', ''))
-            results.append({
-                'id': f"E{idx}",
-                'location': location,
-                'experience': title,
-                'pricing': pricing,
-                'keyword': keyword,
-            })
-            idx += 1
-    return results
-
-
-experience_listings = _load_experiences_from_csv()
-
-if not experience_listings:
-    experience_listings = [
-        {"id": "E1", "location": "Paris, France", "experience": "Eiffel Tower Tour", "pricing": "high", "keyword": "Sightseeing"},
-        {"id": "E2", "location": "Paris, France", "experience": "Wine Tasting", "pricing": "medium", "keyword": "Relaxing"},
-        {"id": "E3", "location": "Paris, France", "experience": "Seine River Cruise", "pricing": "medium", "keyword": "Sightseeing"},
-        {"id": "E4", "location": "New York, USA", "experience": "Broadway Show", "pricing": "ultra high", "keyword": "Education"},
-        {"id": "E5", "location": "New York, USA", "experience": "Central Park Picnic", "pricing": "low", "keyword": "Relaxing"},
-        {"id": "E6", "location": "Tokyo, Japan", "experience": "Sushi Making Class", "pricing": "high", "keyword": "Education"},
-        {"id": "E7", "location": "Tokyo, Japan", "experience": "Cherry Blossom Viewing", "pricing": "medium", "keyword": "Sightseeing"},
-    ]
-
-
-experience_id_dict = {a['id']: a for a in experience_listings}
\ No newline at end of file
+# Words users (and the extractor) use for each keyword category. Plurals
+# need not be listed: terms are singularized on both sides.
+KEYWORD_SYNONYMS = {
+    "Comedy": ["comedy", "improv", "stand-up", "stand up", "standup", "laugh", "funny"],
+    "Education": ["education", "educational", "class", "workshop", "lesson", "course", "lecture", "science", "robotics", "stem", "learning"],
+    "Museum": ["museum", "exhibit", "exhibition", "gallery", "observatory", "planetarium", "art", "culture", "cultural"],
+    "Adventure": ["adventure", "adventurous", "kayak", "kayaking", "bike", "biking", "hike", "hiking", "canoe", "zipline", "outdoor", "outdoors", "nature", "active"],
+    "Historic": ["historic", "history", "historical", "heritage", "colonial", "freedom trail", "culture", "cultural"],
+    "Relaxing": ["relaxing", "relax", "relaxation", "picnic", "tea", "quiet", "garden", "courtyard", "spa", "calm"],
+    "Sightseeing": ["sightseeing", "sight", "tour", "cruise", "view", "panoramic", "walk", "trail", "boat", "landmark"],
+}
+
+
+def _term(text):
+    """Lower-case, single-spaced and singular: "Art Galleries" -> "art gallery"."""
+    words = re.sub(r"\s+", " ", str(text or "").lower()).strip().split(" ")
+    last = words[-1]
+    if last.endswith("ies") and len(last) > 4:
+        last = last[:-3] + "y"
+    elif last.endswith("s") and not last.endswith("ss") and len(last) > 3:
+        last = last[:-1]
+    return " ".join(words[:-1] + [last])
+
+
+@lru_cache(maxsize=None)
+def keyword_index(vocabulary):
+    """term -> keyword categories for a store's keyword vocabulary, built once per vocabulary."""
+    index = {}
+    for keyword in vocabulary:
+        for term in [keyword] + KEYWORD_SYNONYMS.get(keyword, []):
+            index.setdefault(_term(term), []).append(keyword)
+    return {term: tuple(dict.fromkeys(keywords)) for term, keywords in index.items()}
+
+
+def match_keywords(vocabulary, experience_types):
+    """Keyword categories the requested experience types refer to.
+
+    A multi-word type that is not a known term falls back to its words, so
+    "Museum visits" still finds Museum.
+    """
+    index = keyword_index(tuple(vocabulary))
+    matched = []
+    for experience_type in experience_types:
+        term = _term(experience_type)
+        keywords = index.get(term)
+        if keywords is None:
+            keywords = [k for word in term.split(" ") for k in index.get(_term(word), ())]
+        matched.extend(keywords)
+    return list(dict.fromkeys(matched))
+
+
+def find_source():
+    return _find_experiences_csv(os.path.dirname(__file__) or ".")
+
+
+def _column(df, name):
+    if name in df:
+        return df[name].to_numpy(dtype=object)
+    return np.full(len(df), '', dtype=object)
+
+
+def _map_unique(func, *columns):
+    """Apply a scalar normalizer once per distinct input instead of once per row."""
+    keys = list(zip(*columns))
+    cache = {}
+    return np.array([cache[k] if k in cache else cache.setdefault(k, func(*k)) for k in keys], dtype=object)
+
+
+def _normalize_chunk(df, start):
+    company = _column(df, 'Company Name')
+    description = _column(df, 'Experience Description')
+    cost_raw = _column(df, 'Cost ($)')
+    title = np.where(description != '', description, np.where(company != '', company, 'Experience'))
+    keyword = np.char.strip(_column(df, 'Keyword').astype(str)).astype(object)
+    missing = keyword == ''
+    if missing.any():
+        # Compute keyword if CSV lacks it
+        keyword[missing] = _map_unique(_categorize_keyword, title[missing])
+    cost = numbers(cost_raw)
+    cost[np.char.lower(np.char.strip(cost_raw.astype(str))) == 'free'] = 0.0
+
+    location = _map_unique(_normalize_location, _column(df, 'City Location'), _column(df, 'Country'))
+
+    columns = {'id': np.arange(start + 1, start + len(df) + 1, dtype=np.int64)}
+    vocabularies = {}
+    for field, values in (
+        ('location', location),
+        ('pricing', _map_unique(_price_bucket, cost_raw)),
+        ('keyword', keyword),
+    ):
+        columns[field], vocabularies[field] = encode(values)
+    columns['experience'] = text(title)
+    columns['company'] = text(company)
+    columns['cost'] = cost
+    columns['lat'], columns['lon'] = geo.coordinates(location, title, company)
+    return columns, vocabularies
+
+
+def _make_record(columns, vocabularies, i):
+    return {
+        'id': f"E{columns['id'][i]}",
+        'location': vocabularies['location'][columns['location'][i]],
+        'experience': str(columns['experience'][i]),
+        'company': str(columns['company'][i]),
+        'pricing': vocabularies['pricing'][columns['pricing'][i]],
+        'keyword': vocabularies['keyword'][columns['keyword'][i]],
+        'cost': scalar(columns['cost'][i]),
+    }
+
+
+FALLBACK_EXPERIENCES = [
+    {"id": "E1", "location": "Paris, France", "experience": "Eiffel Tower Tour", "pricing": "high", "keyword": "Sightseeing"},
+    {"id": "E2", "location": "Paris, France", "experience": "Wine Tasting", "pricing": "medium", "keyword": "Relaxing"},
+    {"id": "E3", "location": "Paris, France", "experience": "Seine River Cruise", "pricing": "medium", "keyword": "Sightseeing"},
+    {"id": "E4", "location": "New York, USA", "experience": "Broadway Show", "pricing": "ultra high", "keyword": "Education"},
+    {"id": "E5", "location": "New York, USA", "experience": "Central Park Picnic", "pricing": "low", "keyword": "Relaxing"},
+    {"id": "E6", "location": "Tokyo, Japan", "experience": "Sushi Making Class", "pricing": "high", "keyword": "Education"},
+    {"id": "E7", "location": "Tokyo, Japan", "experience": "Cherry Blossom Viewing", "pricing": "medium", "keyword": "Sightseeing"},
+]
+
+
+def _tfidf_texts(shards):
+    return np.concatenate([
+        join_text(columns["experience"], columns["company"], np.asarray(meta["vocabularies"]["keyword"], dtype=str)[columns["keyword"]])
+        for columns, meta in shards
+    ])
+
+
+def build_experience_store(listings):
+    store = ColumnStore(listings, numeric=("cost",), categorical=("keyword", "pricing"))
+    store.index_sorted("cost")
+    store.index_postings("keyword")
+    texts = join_text([e.get("experience") for e in listings], [e.get("company") for e in listings])
+    index_text(store, [(0, texts)])
+    store.tfidf = build_tfidf(join_text(texts, [e.get("keyword") for e in listings]))
+    geo.attach_coordinates(store, *geo.coordinates(
+        [e.get("location") for e in listings], [e.get("experience") for e in listings],
+        [e.get("company") for e in listings],
+    ))
+    store.similarity = build_similarity(store, "experience")
+    return store
+
+
+def load_experience_store(csv_path=""):
+    """Memory-mapped store over the ingested experiences CSV (re-ingested when it changes)."""
+    if not csv_path or not os.path.exists(csv_path):
+        return build_experience_store(FALLBACK_EXPERIENCES)
+    shards = open_shards(load_shards(csv_path, "experience", _normalize_chunk, version=3))
+    records = ShardRecords(shards, _make_record)
+    if not len(records):
+        return build_experience_store(FALLBACK_EXPERIENCES)
+    store = ColumnStore.from_columns(
+        records,
+        DenseIds("E", len(records)),
+        concat_categorical(shards, "location"),
+        numeric={"cost": concat_numeric(shards, "cost")},
+        categorical={
+            "keyword": concat_categorical(shards, "keyword"),
+            "pricing": concat_categorical(shards, "pricing"),
+        },
+    )
+    store.index_sorted("cost")
+    store.index_postings("keyword")
+    index_text(store, (
+        (start, join_text(columns["experience"], columns["company"]))
+        for start, (columns, _) in zip(records.offsets, shards)
+    ))
+    store.tfidf = load_snapshot(csv_path, lambda path: build_tfidf(_tfidf_texts(shards)), name="experience.tfidf")
+    geo.attach_coordinates(store, concat_numeric(shards, "lat"), concat_numeric(shards, "lon"))
+    store.similarity = load_snapshot(csv_path, lambda path: build_similarity(store, "experience"), name="experience.similarity")
+    return store
+
+
+def __getattr__(name):
+    # Legacy module globals, served lazily from the shared catalog
+    from catalog import catalog
+    if name == "experience_store":
+        return catalog.store("experience")
+    if name == "experience_listings":
+        return catalog.listings("experience")
+    if name == "experience_id_dict":
+        return catalog.id_view("experience")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
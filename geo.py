@@ -0,0 +1,174 @@
+import csv
+import math
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from listing_store import city_key
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GEOCODES_CSV = os.path.join(BASE_DIR, "geocodes.csv")
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+CELL_KM = 1.0
+
+
+@lru_cache(maxsize=None)
+def load_geocodes(path=GEOCODES_CSV):
+    """Offline (city, place) -> (lat, lon) table; an empty place is the city centre.
+
+    The table is plain CSV so it can be extended by hand or regenerated with
+    tools/build_geocodes.py; nothing here touches the network.
+    """
+    table = {}
+    if not os.path.exists(path):
+        return table
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                point = (float(row["lat"]), float(row["lon"]))
+            except (TypeError, ValueError):
+                continue
+            table[(city_key(row.get("city")), (row.get("place") or "").strip().lower())] = point
+    return table
+
+
+@lru_cache(maxsize=None)
+def _place_pattern(city, path=GEOCODES_CSV):
+    # Longest names first, so "Boston Common" wins over "Boston" and "Fenway Park" over "Fenway"
+    places = sorted((place for c, place in load_geocodes(path) if c == city and place), key=len, reverse=True)
+    if not places:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(p) for p in places) + r")\b")
+
+
+def locate(location, *texts, path=GEOCODES_CSV):
+    """(lat, lon) for a listing: the first known place named in `texts`, else its city centre.
+
+    Unknown cities give (nan, nan).
+    """
+    table = load_geocodes(path)
+    city = city_key(location)
+    pattern = _place_pattern(city, path)
+    if pattern is not None:
+        for text in texts:
+            match = pattern.search((text or "").lower())
+            if match:
+                return table[(city, match.group(0))]
+    return table.get((city, ""), (np.nan, np.nan))
+
+
+def coordinates(locations, *texts):
+    """Vectorized locate() over parallel columns; each distinct row is geocoded once."""
+    keys = list(zip(locations, *texts))
+    cache = {}
+    points = np.array(
+        [cache[k] if k in cache else cache.setdefault(k, locate(*k)) for k in keys],
+        dtype=np.float64,
+    ).reshape(len(keys), 2)
+    return points[:, 0], points[:, 1]
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GridIndex:
+    """Rows bucketed into roughly cell_km x cell_km lat/lon cells.
+
+    Cells are sorted int64 keys with row ranges into one `order` array, so a
+    radius query is a handful of searchsorted calls over the overlapping
+    cells and one vectorized haversine over the rows they hold. Rows without
+    coordinates are left out.
+    """
+
+    def __init__(self, lat, lon, cell_km=CELL_KM):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.cell_deg = cell_km / KM_PER_DEGREE
+        valid = np.flatnonzero(~(np.isnan(self.lat) | np.isnan(self.lon)))
+        keys = self._keys(self.lat[valid], self.lon[valid])
+        order = np.argsort(keys, kind="stable")
+        self.order = valid[order]
+        self.cells, self.starts = np.unique(keys[order], return_index=True)
+        self.ends = np.append(self.starts[1:], len(self.order))
+
+    def _cell(self, degrees):
+        return np.floor(np.asarray(degrees) / self.cell_deg).astype(np.int64)
+
+    def _keys(self, lat, lon):
+        return (self._cell(lat) << 32) + (self._cell(lon) & 0xFFFFFFFF)
+
+    def __len__(self):
+        return len(self.order)
+
+    def cell_of(self, rows):
+        """Dense per-call area codes for rows (same code = same cell), -1 without coordinates."""
+        lat, lon = self.lat[rows], self.lon[rows]
+        known = ~(np.isnan(lat) | np.isnan(lon))
+        codes = np.full(len(lat), -1, dtype=np.int64)
+        if known.any():
+            codes[known] = np.unique(self._keys(lat[known], lon[known]), return_inverse=True)[1].ravel()
+        return codes
+
+    def within(self, lat, lon, km):
+        """(rows, distances_km) of points within km of (lat, lon), rows ascending."""
+        if not len(self.order) or np.isnan(lat) or np.isnan(lon):
+            return self.order[:0], np.empty(0)
+        dlat = km / KM_PER_DEGREE
+        dlon = dlat / max(math.cos(math.radians(min(abs(lat) + dlat, 89.9))), 1e-6)
+        lat_cells = np.arange(self._cell(lat - dlat), self._cell(lat + dlat) + 1)
+        lon_cells = np.arange(self._cell(lon - dlon), self._cell(lon + dlon) + 1)
+        keys = ((lat_cells[:, None] << 32) + (lon_cells[None, :] & 0xFFFFFFFF)).ravel()
+        at = np.searchsorted(self.cells, keys)
+        at = at[(at < len(self.cells)) & (self.cells[np.minimum(at, len(self.cells) - 1)] == keys)]
+        if not len(at):
+            return self.order[:0], np.empty(0)
+        rows = np.concatenate([self.order[s:e] for s, e in zip(self.starts[at], self.ends[at])])
+        dist = haversine_km(lat, lon, self.lat[rows], self.lon[rows])
+        keep = dist <= km
+        rows, dist = rows[keep], dist[keep]
+        order = np.argsort(rows)
+        return rows[order], dist[order]
+
+    def within_any(self, points, km):
+        """(rows, distance to the nearest point) for rows within km of any of `points`."""
+        hits = [self.within(lat, lon, km) for lat, lon in points]
+        if not hits:
+            return self.order[:0], np.empty(0)
+        rows = np.concatenate([r for r, _ in hits])
+        dist = np.concatenate([d for _, d in hits])
+        order = np.lexsort((dist, rows))
+        rows, dist = rows[order], dist[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        return rows[first], dist[first]
+
+
+def attach_coordinates(store, lat, lon, cell_km=CELL_KM):
+    """Add lat/lon columns and a GridIndex over them to a ColumnStore."""
+    store.numeric["lat"] = np.asarray(lat, dtype=np.float64)
+    store.numeric["lon"] = np.asarray(lon, dtype=np.float64)
+    store.spatial = GridIndex(store.numeric["lat"], store.numeric["lon"], cell_km)
+    return store
+
+
+def near(store, points, km):
+    """(rows, distance_km) of `store` listings within km of any (lat, lon) in points."""
+    if store.spatial is None:
+        return np.empty(0, dtype=np.intp), np.empty(0)
+    return store.spatial.within_any(points, km)
+
+
+def points_of(store, rows):
+    """(lat, lon) pairs for rows of a store that has coordinates; rows without are skipped."""
+    lat = store.numeric.get("lat")
+    lon = store.numeric.get("lon")
+    if lat is None or lon is None:
+        return []
+    return [(lat[r], lon[r]) for r in rows if not (np.isnan(lat[r]) or np.isnan(lon[r]))]
@@ -1,8 +1,23 @@
-import pandas as pd
+import argparse
+import csv
+import os
 import random
 
+import geo
+from availability import AvailabilityCalendar, parse_spans
+from listing_store import ColumnRecords, ColumnStore
+from similarity import build_similarity
+from snapshot import load_snapshot
+from text_search import join_text
+from tfidf import build_tfidf
+
 # --- Configuration ---
 NUM_ROWS = 200
+CSV_PATH = os.path.join(os.path.dirname(__file__), "boston_airbnb_data.csv")
+CSV_FIELDS = [
+    "location", "safety_rating", "neighborhood", "housing_type", "bedrooms",
+    "bathrooms", "beds", "rental_type", "cost_per_night", "amenities", "reviews", "id",
+]
 BOSTON_NEIGHBORHOODS = [
     "Allston", "Back Bay", "Bay Village", "Beacon Hill", "Brighton",
     "Charlestown", "Chinatown", "Dorchester", "Downtown", "East Boston",
@@ -17,6 +32,15 @@ AMENITIES_LIST = [
     "Heating", "Dedicated workspace", "Free parking", "Patio", "Gym",
     "Pool", "Hot tub", "Self check-in", "Pets allowed"
 ]
+NUMERIC_FIELDS = ("cost_per_night", "safety_rating", "bedrooms", "bathrooms", "beds")
+CATEGORICAL_FIELDS = ("neighborhood", "housing_type", "rental_type")
+# Field order/kinds of the listing dicts handed out by the store
+RECORD_FIELDS = [
+    ("location", "category"), ("safety_rating", "float"), ("neighborhood", "category"),
+    ("housing_type", "category"), ("bedrooms", "int"), ("bathrooms", "int"), ("beds", "int"),
+    ("rental_type", "category"), ("cost_per_night", "int"), ("amenities", "labels"),
+    ("reviews", "category"), ("id", "id"), ("scheduled_dates", "category"), ("capacity", "int"),
+]
 REVIEW_SNIPPETS = [
     "Spacious and central", "Quiet street", "Comfortable beds",
     "Great host, very responsive", "Clean and tidy", "Amazing view",
@@ -27,60 +51,164 @@ REVIEW_SNIPPETS = [
     "Stylish and modern apartment."
 ]
 
-# --- Data Generation ---
-data = []
-for _ in range(NUM_ROWS):
-    housing_type = random.choice(HOUSING_TYPES)
-    bedrooms = random.randint(1, 5)
-    bathrooms = random.randint(1, max(1, bedrooms - 1))
-    beds = random.randint(bedrooms, bedrooms * 2)
-    rental_type = random.choice(RENTAL_TYPES)
-
-    # Determine cost based on features
-    base_cost = 80
-    cost = base_cost + (bedrooms * 50) + (bathrooms * 25)
-    if rental_type == "Private room":
-        cost *= 0.6
-    elif rental_type == "Shared room":
-        cost *= 0.4
-    cost += random.randint(-20, 20) # Add some noise
-    cost = int(round(cost / 5) * 5) # Round to nearest 5
-
-    listing = {
-        "location": "Boston",
-        "safety_rating": round(random.uniform(3.5, 5.0), 2),
-        "neighborhood": random.choice(BOSTON_NEIGHBORHOODS),
-        "housing_type": housing_type,
-        "bedrooms": bedrooms,
-        "bathrooms": bathrooms,
-        "beds": beds,
-        "rental_type": rental_type,
-        "cost_per_night": cost,
-        "amenities": random.sample(AMENITIES_LIST, k=random.randint(4, 10)),
-        "reviews": random.sample(REVIEW_SNIPPETS, k=random.randint(2, 5))
-    }
-    data.append(listing)
-
-# --- Create and Save DataFrame ---
-df = pd.DataFrame(data)
-
-# Convert lists to strings for CSV compatibility
-df['amenities'] = df['amenities'].apply(lambda x: ', '.join(x))
-df['reviews'] = df['reviews'].apply(lambda x: '; '.join(x))
-# Generate per-row string IDs like H1, H2, ... (avoid a single f-string over the whole Index)
-df['id'] = ['H{}'.format(i + 1) for i in df.index]
-
-
-# Save to a file
-df.to_csv("boston_airbnb_data.csv", index=False)
-
-print("Successfully generated boston_airbnb_data.csv with 200 listings.")
-
-
-# Convert amenities back to list form for in-app filtering/scoring
-housing_listings = df.to_dict(orient='records')
-for rec in housing_listings:
-    if isinstance(rec.get('amenities'), str):
-        rec['amenities'] = [a.strip() for a in rec['amenities'].split(',') if a.strip()]
-
-housing_id_dict = {a['id']: a for a in housing_listings}
\ No newline at end of file
+
+# --- Data Generation (explicit only: `python housing_listings.py --seed N`) ---
+def generate_listings(num_rows=NUM_ROWS, seed=0):
+    rng = random.Random(seed)
+    data = []
+    for i in range(num_rows):
+        housing_type = rng.choice(HOUSING_TYPES)
+        bedrooms = rng.randint(1, 5)
+        bathrooms = rng.randint(1, max(1, bedrooms - 1))
+        beds = rng.randint(bedrooms, bedrooms * 2)
+        rental_type = rng.choice(RENTAL_TYPES)
+
+        # Determine cost based on features
+        base_cost = 80
+        cost = base_cost + (bedrooms * 50) + (bathrooms * 25)
+        if rental_type == "Private room":
+            cost *= 0.6
+        elif rental_type == "Shared room":
+            cost *= 0.4
+        cost += rng.randint(-20, 20) # Add some noise
+        cost = int(round(cost / 5) * 5) # Round to nearest 5
+
+        data.append({
+            "location": "Boston",
+            "safety_rating": round(rng.uniform(3.5, 5.0), 2),
+            "neighborhood": rng.choice(BOSTON_NEIGHBORHOODS),
+            "housing_type": housing_type,
+            "bedrooms": bedrooms,
+            "bathrooms": bathrooms,
+            "beds": beds,
+            "rental_type": rental_type,
+            "cost_per_night": cost,
+            "amenities": rng.sample(AMENITIES_LIST, k=rng.randint(4, 10)),
+            "reviews": "; ".join(rng.sample(REVIEW_SNIPPETS, k=rng.randint(2, 5))),
+            "id": f"H{i + 1}",
+        })
+    return data
+
+
+def write_csv(listings, csv_path=CSV_PATH):
+    tmp_path = csv_path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for rec in listings:
+            writer.writerow({**rec, "amenities": ", ".join(rec["amenities"])})
+    os.replace(tmp_path, csv_path)
+
+
+# --- Loading ---
+def _to_number(value, cast):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _load_housing_from_csv(csv_path=CSV_PATH):
+    results = []
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            results.append({
+                "location": row.get("location", ""),
+                "safety_rating": _to_number(row.get("safety_rating"), float),
+                "neighborhood": row.get("neighborhood", ""),
+                "housing_type": row.get("housing_type", ""),
+                "bedrooms": _to_number(row.get("bedrooms"), int),
+                "bathrooms": _to_number(row.get("bathrooms"), int),
+                "beds": _to_number(row.get("beds"), int),
+                "rental_type": row.get("rental_type", ""),
+                "cost_per_night": _to_number(row.get("cost_per_night"), int),
+                # Amenities in list form for in-app filtering/scoring
+                "amenities": [a.strip() for a in (row.get("amenities") or "").split(",") if a.strip()],
+                "reviews": row.get("reviews", ""),
+                "id": row.get("id", ""),
+                # Optional "2025-10-01..2025-10-07; ..." days the listing can be booked; empty = any day
+                "scheduled_dates": row.get("scheduled_dates") or "",
+            })
+    return results
+
+
+def capacity_of(listing):
+    """Guests a listing sleeps: two per bed, with a private room capped at two and a shared room taking one.
+
+    Beds fall back to bedrooms; None when both are unknown (a shared room
+    still takes one).
+    """
+    rental_type = (listing.get("rental_type") or "").lower()
+    if rental_type == "shared room":
+        return 1
+    beds = next((v for v in (listing.get("beds"), listing.get("bedrooms")) if v), None)
+    if beds is None:
+        return None
+    capacity = 2 * beds
+    return min(capacity, 2) if rental_type == "private room" else capacity
+
+
+def build_housing_store(listings):
+    """Columnar housing store; the parsed dicts are dropped once encoded.
+
+    Listings are handed out as dicts rebuilt from the columns, so the
+    resident catalog is a handful of arrays plus shared string vocabularies.
+    """
+    store = ColumnStore(
+        listings, numeric=NUMERIC_FIELDS, categorical=CATEGORICAL_FIELDS + ("location", "reviews", "scheduled_dates")
+    )
+    store.add_numeric("capacity", [capacity_of(h) for h in listings])
+    store.add_multilabel("amenities", [h.get("amenities") for h in listings], vocabulary=AMENITIES_LIST)
+    store.index_sorted("cost_per_night")
+    store.availability = AvailabilityCalendar.from_spans([parse_spans(h.get("scheduled_dates")) for h in listings])
+    geo.attach_coordinates(store, *geo.coordinates(
+        [h.get("location") for h in listings], [h.get("neighborhood") for h in listings]
+    ))
+    store.tfidf = build_tfidf(join_text(
+        *([h.get(field) for h in listings] for field in ("housing_type", "rental_type", "neighborhood", "reviews")),
+        [", ".join(h.get("amenities") or ()) for h in listings],
+    ))
+    store.similarity = build_similarity(store, "housing")
+    store.records = ColumnRecords(store, RECORD_FIELDS)
+    return store
+
+
+def _build_housing_store_from_csv(csv_path=CSV_PATH):
+    return build_housing_store(_load_housing_from_csv(csv_path))
+
+
+def find_source():
+    return CSV_PATH if os.path.exists(CSV_PATH) else ""
+
+
+def load_housing_store(csv_path=CSV_PATH):
+    if not csv_path or not os.path.exists(csv_path):
+        return build_housing_store([])
+    return load_snapshot(csv_path, _build_housing_store_from_csv, version=12)
+
+
+def __getattr__(name):
+    # Legacy module globals, served lazily from the shared catalog
+    from catalog import catalog
+    if name == "housing_store":
+        return catalog.store("housing")
+    if name == "housing_listings":
+        return catalog.listings("housing")
+    if name == "housing_id_dict":
+        return catalog.id_view("housing")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate the synthetic Boston housing CSV")
+    parser.add_argument("--seed", type=int, required=True)
+    parser.add_argument("--rows", type=int, default=NUM_ROWS)
+    parser.add_argument("--out", default=CSV_PATH)
+    args = parser.parse_args()
+
+    write_csv(generate_listings(args.rows, args.seed), args.out)
+    print(f"Successfully generated {args.out} with {args.rows} listings.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import bisect
+import os
+import shutil
+import tempfile
+from collections.abc import Sequence
+
+import numpy as np
+
+from columnar import list_shards, read_shard, write_shard
+from snapshot import SNAPSHOT_DIR, file_digest, load_snapshot
+
+
+CHUNK_ROWS = 50_000
+
+
+def iter_csv_chunks(csv_path, chunk_rows=CHUNK_ROWS):
+    """Yield the CSV as DataFrames of at most chunk_rows string-typed rows."""
+    import pandas as pd
+
+    yield from pd.read_csv(csv_path, chunksize=chunk_rows, dtype=str, keep_default_na=False)
+
+
+def encode(values):
+    """Per-shard dictionary encoding: (int32 codes, vocabulary list)."""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), sort=False)
+    return codes.astype(np.int32), [str(u) for u in uniques]
+
+
+def numbers(values):
+    """Float column from strings; empty or unparsable cells become NaN."""
+    import pandas as pd
+
+    return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=np.float64, copy=True)
+
+
+def scalar(value):
+    """A float column cell as a plain float, or None when missing."""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def text(values):
+    """Fixed-width unicode column, so it can be memory-mapped."""
+    return np.asarray(values, dtype=str)
+
+
+def ingest_csv(csv_path, out_root, normalize_chunk, chunk_rows=CHUNK_ROWS):
+    """Stream csv_path through normalize_chunk(df, start) into shards, published as out_root.
+
+    normalize_chunk returns (columns, vocabularies) for one chunk. Only one
+    chunk is ever held in memory, so the source can be arbitrarily large.
+    Shards are written to a private temp directory and renamed into place in
+    one step, so readers never see a half-written out_root; if another worker
+    published out_root first, its copy is kept and this one discarded.
+    """
+    parent = os.path.dirname(out_root)
+    os.makedirs(parent, exist_ok=True)
+    tmp_root = tempfile.mkdtemp(dir=parent, prefix=os.path.basename(out_root) + ".", suffix=".tmp")
+    try:
+        start = 0
+        for i, df in enumerate(iter_csv_chunks(csv_path, chunk_rows)):
+            columns, vocabularies = normalize_chunk(df, start)
+            write_shard(os.path.join(tmp_root, f"shard-{i:05d}"), columns, vocabularies)
+            start += len(df)
+        try:
+            os.rename(tmp_root, out_root)
+        except OSError:
+            if not os.path.isdir(out_root):
+                raise
+            shutil.rmtree(tmp_root, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+        raise
+    return out_root
+
+
+def load_shards(csv_path, name, normalize_chunk, version=1):
+    """Ingest csv_path once (re-ingesting when it changes) and return its shard paths.
+
+    Each ingest lives in a directory named by the source digest, so a new
+    ingest never touches shards other processes may have memory-mapped.
+    """
+    root = os.path.join(SNAPSHOT_DIR, name + "_shards")
+
+    def build(path):
+        out_root = os.path.join(root, file_digest(path)[:16])
+        if not list_shards(out_root):
+            out_root = ingest_csv(path, out_root, normalize_chunk)
+        # Older ingests go; in-progress ones (*.tmp) belong to other workers
+        for entry in os.listdir(root):
+            if entry != os.path.basename(out_root) and not entry.endswith(".tmp"):
+                shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+        return out_root
+
+    out_root = load_snapshot(csv_path, build, name=name + ".shards", version=version)
+    shards = list_shards(out_root)
+    if not shards:
+        shards = list_shards(build(csv_path))
+    return shards
+
+
+class ShardRecords(Sequence):
+    """Listing dicts materialized on demand from memory-mapped shards.
+
+    make_record(columns, vocabularies, i) builds the dict for row i of one
+    shard; nothing is kept, so resident memory is only the pages touched.
+    """
+
+    def __init__(self, shards, make_record):
+        self.shards = shards
+        self.make_record = make_record
+        self.offsets = [0]
+        for _, meta in shards:
+            self.offsets.append(self.offsets[-1] + meta["rows"])
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        s = bisect.bisect_right(self.offsets, i) - 1
+        columns, meta = self.shards[s]
+        return self.make_record(columns, meta["vocabularies"], i - self.offsets[s])
+
+
+def open_shards(paths):
+    return [read_shard(p, mmap=True) for p in paths]
+
+
+def concat_numeric(shards, name):
+    return np.concatenate([np.asarray(c[name], dtype=np.float64) for c, _ in shards]) if shards else np.empty(0)
+
+
+def concat_categorical(shards, name):
+    """Merge per-shard codes into one (codes, categories) pair over a global vocabulary."""
+    categories = []
+    index = {}
+    parts = []
+    for columns, meta in shards:
+        vocab = meta["vocabularies"][name]
+        remap = np.empty(len(vocab), dtype=np.int32)
+        for j, value in enumerate(vocab):
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(categories)
+                categories.append(value)
+            remap[j] = code
+        parts.append(remap[np.asarray(columns[name])] if len(vocab) else np.asarray(columns[name], dtype=np.int32))
+    codes = np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+    return codes, categories
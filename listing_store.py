@@ -0,0 +1,422 @@
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+
+def city_key(location):
+    """Normalize "Boston, USA" / "boston" / " Boston , MA" to the same key."""
+    return (location or "").split(",")[0].strip().lower()
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class Categorical:
+    """A string column stored as int32 codes into a shared vocabulary."""
+
+    def __init__(self, values=()):
+        self.categories = []
+        self.index = {}
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            code = self.index.get(value)
+            if code is None:
+                code = self.index[value] = len(self.categories)
+                self.categories.append(value)
+            codes[i] = code
+        self.codes = codes
+
+    def value(self, row):
+        return self.categories[self.codes[row]]
+
+    @classmethod
+    def from_codes(cls, codes, categories):
+        cat = cls()
+        cat.categories = list(categories)
+        cat.index = {value: code for code, value in enumerate(cat.categories)}
+        cat.codes = np.asarray(codes, dtype=np.int32)
+        return cat
+
+    def isin(self, values, rows=None):
+        lookup = np.zeros(len(self.categories) + 1, dtype=bool)
+        for value in values:
+            code = self.index.get(value)
+            if code is not None:
+                lookup[code] = True
+        return lookup[self.codes if rows is None else self.codes[rows]]
+
+    def groups(self):
+        """Map each category to the (ascending) row positions holding it."""
+        order = np.argsort(self.codes, kind="stable")
+        bounds = np.searchsorted(self.codes[order], np.arange(len(self.categories) + 1))
+        return {value: order[bounds[c]:bounds[c + 1]] for c, value in enumerate(self.categories)}
+
+
+_NO_ROWS = np.empty(0, dtype=np.intp)
+_NO_VALUES = np.empty(0, dtype=np.float64)
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Bitmask:
+    """A set-valued column (e.g. amenities) stored as one bit per label.
+
+    Rows are (n, words) uint64 arrays, so "shares any label" is an AND and
+    "how many labels match" is an AND plus popcount, across the catalog at once.
+    The vocabulary starts from `vocabulary` and grows with any label seen at
+    load time.
+    """
+
+    def __init__(self, rows, vocabulary=()):
+        self.labels = []
+        self.index = {}
+        for label in vocabulary:
+            self._add_label(label)
+        for labels in rows:
+            for label in labels or ():
+                self._add_label(label)
+        self._decoded = {}
+        self.words = max(1, (len(self.labels) + 63) // 64)
+        bits = np.zeros((len(rows), self.words), dtype=np.uint64)
+        for i, labels in enumerate(rows):
+            for label in labels or ():
+                b = self.index[label]
+                bits[i, b >> 6] |= np.uint64(1 << (b & 63))
+        self.bits = bits
+
+    def labels_of(self, row):
+        key = self.bits[row].tobytes()
+        labels = self._decoded.get(key)
+        if labels is None:
+            labels = self._decoded[key] = tuple(
+                label for b, label in enumerate(self.labels) if int(self.bits[row, b >> 6]) >> (b & 63) & 1
+            )
+        return list(labels)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("_decoded", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._decoded = {}
+
+    def _add_label(self, label):
+        if label not in self.index:
+            self.index[label] = len(self.labels)
+            self.labels.append(label)
+
+    def encode(self, labels):
+        """Query mask for `labels`; labels outside the vocabulary are ignored."""
+        q = np.zeros(self.words, dtype=np.uint64)
+        for label in labels:
+            b = self.index.get(label)
+            if b is not None:
+                q[b >> 6] |= np.uint64(1 << (b & 63))
+        return q
+
+    def any(self, labels, rows=None):
+        bits = self.bits if rows is None else self.bits[rows]
+        return (bits & self.encode(labels)).any(axis=1)
+
+    def all(self, labels, rows=None):
+        bits = self.bits if rows is None else self.bits[rows]
+        q = self.encode(labels)
+        return ((bits & q) == q).all(axis=1)
+
+    def count(self, labels, rows=None):
+        bits = self.bits if rows is None else self.bits[rows]
+        hit = np.ascontiguousarray(bits & self.encode(labels))
+        return _POPCOUNT8[hit.view(np.uint8)].reshape(len(hit), -1).sum(axis=1, dtype=np.int32)
+
+
+class DenseIds(Mapping):
+    """Maps "C17" -> row 16 for catalogs whose ids are prefix + 1-based row number.
+
+    Internally listings are addressed by row; string ids only exist at the
+    API/agent/template boundary, via this mapping and format().
+    """
+
+    def __init__(self, prefix, size):
+        self.prefix = prefix
+        self.size = size
+
+    def format(self, row):
+        return f"{self.prefix}{int(row) + 1}"
+
+    def __getitem__(self, listing_id):
+        if isinstance(listing_id, str) and listing_id.startswith(self.prefix):
+            digits = listing_id[len(self.prefix):]
+            if digits.isdigit() and 0 < int(digits) <= self.size:
+                return int(digits) - 1
+        raise KeyError(listing_id)
+
+    def __iter__(self):
+        return (f"{self.prefix}{i + 1}" for i in range(self.size))
+
+    def __len__(self):
+        return self.size
+
+    def subset(self, rows):
+        return SubsetIds(self.prefix, rows)
+
+
+class SubsetIds(Mapping):
+    """DenseIds of some rows of a parent catalog, e.g. one city partition.
+
+    Keeps only the ascending parent rows as int32, so an id resolves with a
+    binary search and costs 4 bytes per listing instead of a str -> row dict.
+    """
+
+    def __init__(self, prefix, parents):
+        self.prefix = prefix
+        self.parents = np.asarray(parents, dtype=np.int32)
+
+    def format(self, row):
+        return f"{self.prefix}{int(self.parents[row]) + 1}"
+
+    def __getitem__(self, listing_id):
+        if isinstance(listing_id, str) and listing_id.startswith(self.prefix):
+            digits = listing_id[len(self.prefix):]
+            if digits.isdigit():
+                parent = int(digits) - 1
+                i = int(np.searchsorted(self.parents, parent))
+                if i < len(self.parents) and self.parents[i] == parent:
+                    return i
+        raise KeyError(listing_id)
+
+    def __iter__(self):
+        return (self.format(i) for i in range(len(self.parents)))
+
+    def __len__(self):
+        return len(self.parents)
+
+    def subset(self, rows):
+        return SubsetIds(self.prefix, self.parents[rows])
+
+
+class SparseIds(Mapping):
+    """Fallback id <-> row mapping for catalogs whose ids are not dense."""
+
+    def __init__(self, ids):
+        self.ids = list(ids)
+        self.index = {listing_id: i for i, listing_id in enumerate(self.ids)}
+
+    def format(self, row):
+        return self.ids[row]
+
+    def __getitem__(self, listing_id):
+        return self.index[listing_id]
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def subset(self, rows):
+        return SparseIds([self.ids[i] for i in rows])
+
+
+def make_ids(ids):
+    ids = list(ids)
+    prefix = ids[0].rstrip("0123456789") if ids and isinstance(ids[0], str) else ""
+    if prefix and all(listing_id == f"{prefix}{i + 1}" for i, listing_id in enumerate(ids)):
+        return DenseIds(prefix, len(ids))
+    return SparseIds(ids)
+
+
+class ColumnRecords(Sequence):
+    """Listing dicts rebuilt on demand from a ColumnStore's columns.
+
+    `fields` is a list of (name, kind) with kind one of "id", "float",
+    "int", "category" or "labels". Nothing per-listing is kept besides the
+    column values, and repeated strings come from the shared vocabularies.
+    """
+
+    def __init__(self, store, fields):
+        self.store = store
+        self.fields = list(fields)
+
+    def __len__(self):
+        return len(self.store.rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        store = self.store
+        record = {}
+        for name, kind in self.fields:
+            if kind == "id":
+                record[name] = store.rows.format(i)
+            elif kind == "category":
+                record[name] = store.categorical[name].value(i)
+            elif kind == "labels":
+                record[name] = store.multilabel[name].labels_of(i)
+            else:
+                value = store.numeric[name][i]
+                record[name] = None if np.isnan(value) else (int(value) if kind == "int" else float(value))
+        return record
+
+
+class ColumnStore:
+    """Columnar view over a list of listing dicts.
+
+    Numeric fields become float64 arrays (missing -> NaN) and categorical
+    fields become Categorical codes, so filters are boolean masks over the
+    whole catalog instead of per-row Python checks. `records` keeps the
+    original dicts for whatever the caller returns (or a ColumnRecords view
+    when the dicts are dropped); `rows` maps listing id to row position.
+
+    `by_city` is an inverted index from city_key(location) to row positions,
+    built once here, so a request only ever touches its destination's rows.
+    Mask helpers take an optional `rows` array and then return a mask aligned
+    with it rather than with the whole catalog. `spatial` is an optional
+    geo.GridIndex over the lat/lon columns, and `sorted` holds per-city
+    value-ordered indexes of numeric fields for range queries (index_sorted).
+    `postings` maps a categorical field to its value -> rows inverted index,
+    `text_index` is an optional text_search.BM25Index over its rows,
+    `tfidf` an optional tfidf.TfidfIndex, `availability` an optional
+    availability.AvailabilityCalendar and `similarity` an optional
+    similarity.SimilarityIndex.
+    """
+
+    def __init__(self, records, numeric=(), categorical=(), id_field="id", location_field="location"):
+        self.records = records
+        self.rows = make_ids(r.get(id_field) for r in records)
+        self.index_locations(Categorical([r.get(location_field) for r in records]))
+        self.numeric = {}
+        self.categorical = {}
+        self.multilabel = {}
+        self.spatial = None
+        self.sorted = {}
+        self.postings = {}
+        self.text_index = None
+        self.tfidf = None
+        self.availability = None
+        self.similarity = None
+        for field in numeric:
+            self.add_numeric(field, [r.get(field) for r in records])
+        for field in categorical:
+            self.add_categorical(field, [r.get(field) for r in records])
+
+    @classmethod
+    def from_columns(cls, records, rows, location, numeric=None, categorical=None):
+        """Build a store from ready-made arrays (e.g. memory-mapped shards).
+
+        `location` and each categorical value are (codes, categories) pairs;
+        `rows` is any id -> row mapping such as DenseIds.
+        """
+        store = cls.__new__(cls)
+        store.records = records
+        store.rows = rows
+        store.index_locations(Categorical.from_codes(*location))
+        store.numeric = {name: np.asarray(values, dtype=np.float64) for name, values in (numeric or {}).items()}
+        store.categorical = {name: Categorical.from_codes(*pair) for name, pair in (categorical or {}).items()}
+        store.multilabel = {}
+        store.spatial = None
+        store.sorted = {}
+        store.postings = {}
+        store.text_index = None
+        store.tfidf = None
+        store.availability = None
+        store.similarity = None
+        return store
+
+    def __len__(self):
+        return len(self.records)
+
+    def index_locations(self, locations):
+        keys = Categorical([city_key(value) for value in locations.categories])
+        city_codes = keys.codes[locations.codes] if len(locations.codes) else locations.codes
+        self.by_city = Categorical.from_codes(city_codes, keys.categories).groups()
+
+    def add_numeric(self, name, values):
+        self.numeric[name] = np.fromiter((_as_float(v) for v in values), dtype=np.float64, count=len(self.records))
+
+    def add_categorical(self, name, values):
+        self.categorical[name] = Categorical(values)
+
+    def add_multilabel(self, name, values, vocabulary=()):
+        self.multilabel[name] = Bitmask(values, vocabulary)
+
+    def row(self, listing_id):
+        return self.rows.get(listing_id)
+
+    def listing_id(self, row):
+        return self.rows.format(row)
+
+    def get(self, listing_id, default=None):
+        i = self.rows.get(listing_id)
+        return default if i is None else self.records[i]
+
+    def candidates(self, location):
+        return self.by_city.get(city_key(location), _NO_ROWS)
+
+    def isin(self, field, values, rows=None):
+        return self.categorical[field].isin(values, rows)
+
+    def has_any(self, field, labels, rows=None):
+        return self.multilabel[field].any(labels, rows)
+
+    def match_count(self, field, labels, rows=None):
+        return self.multilabel[field].count(labels, rows)
+
+    def index_sorted(self, field):
+        """Index `field` per city in ascending value order (missing values last)."""
+        col = self.numeric[field]
+        index = {}
+        for key, rows in self.by_city.items():
+            order = np.argsort(col[rows], kind="stable")
+            index[key] = (col[rows][order], rows[order])
+        self.sorted[field] = index
+
+    def in_range(self, field, location, lo=None, hi=None, keep_missing=False):
+        """Ascending rows of `location` with lo <= field <= hi, found by bisecting its sorted index.
+
+        Rows with no value are dropped unless keep_missing is set.
+        """
+        values, rows = self.sorted[field].get(city_key(location), (_NO_VALUES, _NO_ROWS))
+        missing = np.searchsorted(values, np.nan)
+        start = 0 if lo is None else np.searchsorted(values[:missing], lo, side="left")
+        end = missing if hi is None else np.searchsorted(values[:missing], hi, side="right")
+        hits = rows[start:end]
+        if keep_missing:
+            hits = np.concatenate([hits, rows[missing:]])
+        return np.sort(hits)
+
+    def index_postings(self, field):
+        self.postings[field] = self.categorical[field].groups()
+
+    def rows_with(self, field, values):
+        """Ascending rows whose `field` is any of `values`: a union of posting lists."""
+        postings = self.postings[field]
+        lists = [postings[v] for v in dict.fromkeys(values) if v in postings]
+        if not lists:
+            return _NO_ROWS
+        return lists[0] if len(lists) == 1 else np.sort(np.concatenate(lists))
+
+    def between(self, field, lo=None, hi=None, rows=None):
+        col = self.numeric[field] if rows is None else self.numeric[field][rows]
+        mask = ~np.isnan(col)
+        if lo is not None:
+            mask &= col >= lo
+        if hi is not None:
+            mask &= col <= hi
+        return mask
+
+    def select(self, mask):
+        return self.take(np.flatnonzero(mask))
+
+    def take(self, rows):
+        records = self.records
+        return [records[i] for i in rows]
@@ -0,0 +1,224 @@
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import types
+from collections import OrderedDict
+
+import numpy as np
+
+from snapshot import SNAPSHOT_DIR, file_digest, load_snapshot
+
+
+PARTITIONS_DIR = os.path.join(SNAPSHOT_DIR, "partitions")
+INDEX_FILE = "index.pkl"
+# Bump when the layout of a partition's store changes
+PARTITIONS_VERSION = 13
+
+
+def _dump(obj, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def write_partitions(store, build_store, out_dir):
+    """Split a full ColumnStore into one pickled store per city, published as out_dir.
+
+    Partitions are written to a private temp directory and renamed into place
+    in one step; if another worker published out_dir first, its copy is kept
+    and this one discarded. Each partition keeps its parent's id mapping for
+    its rows (store.rows.subset), so dense ids stay a row array per city.
+    The index records each partition's store_nbytes, measured here once so
+    loading a partition does not have to walk it again.
+    """
+    parent = os.path.dirname(out_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=os.path.basename(out_dir) + ".", suffix=".tmp")
+    try:
+        cities = list(store.by_city)
+        city_of_row = np.full(len(store), -1, dtype=np.int32)
+        nbytes = []
+        for c, key in enumerate(cities):
+            rows = store.by_city[key]
+            city_of_row[rows] = c
+            part = build_store(store.take(rows))
+            part.rows = store.rows.subset(rows)
+            nbytes.append(store_nbytes(part))
+            _dump(part, os.path.join(tmp_dir, f"city-{c:05d}.pkl"))
+        index = {"cities": cities, "city_of_row": city_of_row, "rows": store.rows, "nbytes": nbytes}
+        _dump(index, os.path.join(tmp_dir, INDEX_FILE))
+        try:
+            os.rename(tmp_dir, out_dir)
+        except OSError:
+            if not os.path.isdir(out_dir):
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return out_dir
+
+
+class PartitionIndex:
+    """Which city partition holds each listing, and where partitions live on disk."""
+
+    def __init__(self, root, build_store):
+        with open(os.path.join(root, INDEX_FILE), "rb") as f:
+            index = pickle.load(f)
+        self.root = root
+        self.cities = index["cities"]
+        self.codes = {key: c for c, key in enumerate(self.cities)}
+        self.city_of_row = index["city_of_row"]
+        self.rows = index["rows"]
+        self.nbytes = index["nbytes"]
+        self.empty = build_store([])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def city_code(self, key):
+        return self.codes.get(key)
+
+    def city_of(self, listing_id):
+        row = self.rows.get(listing_id)
+        if row is None or self.city_of_row[row] < 0:
+            return None
+        return int(self.city_of_row[row])
+
+    def load(self, code):
+        with open(os.path.join(self.root, f"city-{code:05d}.pkl"), "rb") as f:
+            return pickle.load(f)
+
+
+def load_partitions(category, source_path, load_store, build_store):
+    """PartitionIndex for source_path, (re)partitioning only when the source changed."""
+    root = os.path.join(PARTITIONS_DIR, category)
+
+    def build(path):
+        out_dir = os.path.join(root, file_digest(path)[:16])
+        if not os.path.exists(os.path.join(out_dir, INDEX_FILE)):
+            write_partitions(load_store(path), build_store, out_dir)
+        # Older partitionings go; in-progress ones (*.tmp) belong to other workers
+        for name in os.listdir(root):
+            if os.path.join(root, name) != out_dir and not name.endswith(".tmp"):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        return out_dir
+
+    out_dir = load_snapshot(source_path, build, name=f"{category}.partitions", version=PARTITIONS_VERSION)
+    if not os.path.exists(os.path.join(out_dir, INDEX_FILE)):
+        out_dir = build(source_path)
+    return PartitionIndex(out_dir, build_store)
+
+
+_LEAVES = (str, bytes, int, float, bool, type(None))
+
+
+def _nbytes(obj, seen):
+    """Approximate resident bytes of obj and what it references (each object counted once)."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += _items_nbytes(list(obj.keys()) + list(obj.values()), seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += _items_nbytes(obj, seen)
+    elif callable(obj) or isinstance(obj, _LEAVES + (types.ModuleType,)):
+        pass
+    elif hasattr(obj, "__dict__"):
+        # Columns, indexes, id maps, sparse matrices, the TF-IDF vocabulary, ...
+        size += _nbytes(vars(obj), seen)
+    return size
+
+
+def _items_nbytes(items, seen):
+    # Strings and numbers are sized in bulk; vocabularies hold hundreds of thousands
+    fresh = {id(v): v for v in items if type(v) in _LEAVES and id(v) not in seen}
+    seen.update(fresh)
+    size = sum(map(sys.getsizeof, fresh.values()))
+    return size + sum(_nbytes(v, seen) for v in items if type(v) not in _LEAVES)
+
+
+def store_nbytes(store):
+    """Approximate resident size of a ColumnStore and all its indexes.
+
+    Everything reachable from the store is walked, except materialized
+    record dicts, which are estimated from the first one.
+    """
+    records = store.records
+    seen = {id(records)}
+    total = _nbytes(store, seen)
+    if isinstance(records, list) and records:
+        sample = records[0]
+        per_record = sys.getsizeof(sample) + sum(sys.getsizeof(v) for v in sample.values())
+        total += sys.getsizeof(records) + len(records) * per_record
+    elif not isinstance(records, list):
+        total += _nbytes(records, seen)
+    return total
+
+
+class PartitionCache:
+    """LRU of loaded city partitions bounded by an approximate byte budget."""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load, size=None):
+        """The item cached under key, else load() and cache it (size: its bytes, default store_nbytes)."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[0]
+        store = load()
+        if size is None:
+            size = store_nbytes(store)
+        with self._lock:
+            self.misses += 1
+            item = self._items.get(key)
+            if item is not None:
+                return item[0]
+            self._items[key] = (store, size)
+            self.nbytes += size
+            # Always keep the partition just loaded, even if it alone exceeds the budget
+            while self.nbytes > self.budget_bytes and len(self._items) > 1:
+                _, (_, old_size) = self._items.popitem(last=False)
+                self.nbytes -= old_size
+                self.evictions += 1
+        return store
+
+    def items(self):
+        """[(key, store)] of the cached partitions."""
+        with self._lock:
+            return [(key, item[0]) for key, item in self._items.items()]
+
+    def discard(self, predicate):
+        with self._lock:
+            for key in [k for k in self._items if predicate(k)]:
+                self.nbytes -= self._items.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "partitions": len(self._items),
+                "nbytes": self.nbytes,
+                "budget_bytes": self.budget_bytes,
+            }
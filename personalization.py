@@ -0,0 +1,168 @@
+import math
+
+import numpy as np
+
+
+# Listing fields a user's taste is learned over, per category ("price" is the price band)
+TASTE_FIELDS = {
+    "housing": ("amenities", "housing_type", "neighborhood", "price"),
+    "cuisine": ("cuisine_type", "price"),
+    "experience": ("keyword", "price"),
+}
+# Nightly price bands for stays; restaurants and experiences have their own "pricing" bucket
+HOUSING_PRICE_BANDS = ((100, "low"), (200, "medium"), (math.inf, "high"))
+# A new session moves the weights at least this far towards its likes
+TASTE_RATE = 0.3
+# Weights below this are dropped to keep the stored vector small
+MIN_WEIGHT = 0.01
+# Most recent likes kept per category, for the co-like neighbour scores
+LIKED_KEEP = 50
+
+
+def price_band(category, listing):
+    if category != "housing":
+        return listing.get("pricing") or None
+    cost = listing.get("cost_per_night")
+    if cost is None:
+        return None
+    return next(band for limit, band in HOUSING_PRICE_BANDS if cost < limit)
+
+
+def listing_features(category, listing):
+    """The "field:value" taste features of one listing dict."""
+    out = []
+    for field in TASTE_FIELDS[category]:
+        if field == "price":
+            values = [price_band(category, listing)]
+        elif field == "amenities":
+            values = listing.get("amenities") or []
+        else:
+            values = [listing.get(field)]
+        out += [f"{field}:{value}" for value in values if value]
+    return out
+
+
+def update_taste(taste, likes, lookup):
+    """Fold one swipe session's likes into a stored taste vector and return it.
+
+    `taste` is {category: {"n": sessions, "w": {feature: weight}, "liked":
+    [recent ids]}} (or None), `likes` maps category -> liked ids and
+    `lookup(category, id)` returns the listing dict. Each weight moves towards
+    the share of this session's liked listings having that feature, so the
+    work is proportional to the features involved; categories with no likes
+    this session are left alone.
+    """
+    taste = {category: dict(entry) for category, entry in (taste or {}).items()}
+    for category in TASTE_FIELDS:
+        ids = list(dict.fromkeys((likes or {}).get(category) or []))
+        liked = [lookup(category, i) for i in ids]
+        liked = [listing for listing in liked if listing]
+        if not liked:
+            continue
+        share = {}
+        for listing in liked:
+            for feature in set(listing_features(category, listing)):
+                share[feature] = share.get(feature, 0.0) + 1.0 / len(liked)
+        entry = taste.get(category) or {"n": 0, "w": {}}
+        rate = max(1.0 / (entry["n"] + 1), TASTE_RATE)
+        weights = {}
+        for feature in set(entry["w"]) | set(share):
+            weight = (1.0 - rate) * entry["w"].get(feature, 0.0) + rate * share.get(feature, 0.0)
+            if weight >= MIN_WEIGHT:
+                weights[feature] = round(weight, 3)
+        recent = [i for i in entry.get("liked", []) if i not in ids] + ids
+        taste[category] = {"n": entry["n"] + 1, "w": weights, "liked": recent[-LIKED_KEEP:]}
+    return taste
+
+
+def taste_of(username):
+    """The stored taste vector of a user ({} for unknown and anonymous users)."""
+    from user_store import get_user, is_guest
+
+    if is_guest(username):
+        return {}
+
+    return get_user(username).get("taste") or {}
+
+
+def liked_ids(taste):
+    """Recently liked ids of every category in a taste vector."""
+    return [i for entry in (taste or {}).values() for i in entry.get("liked", ())]
+
+
+def taste_key(taste, category):
+    """Hashable form of what ranking reads from a taste for one category, for cache keys."""
+    return tuple(sorted(((taste or {}).get(category) or {}).get("w", {}).items())), tuple(liked_ids(taste))
+
+
+def _by_value(weights, field):
+    prefix = field + ":"
+    return {feature[len(prefix):]: w for feature, w in weights.items() if feature.startswith(prefix)}
+
+
+def affinity(store, category, rows, taste):
+    """Per-row match in [0, 1] between listings and the user's taste, or None without one.
+
+    Each taste field scores the weight of the row's value (the mean weight
+    of its amenities) and the fields are averaged.
+    """
+    weights = ((taste or {}).get(category) or {}).get("w")
+    if not weights:
+        return None
+    parts = []
+    for field in TASTE_FIELDS[category]:
+        by_value = _by_value(weights, field)
+        if field == "amenities":
+            total = np.zeros(len(rows))
+            for label, w in by_value.items():
+                total += w * store.has_any(field, [label], rows)
+            count = store.match_count(field, store.multilabel[field].labels, rows)
+            parts.append(np.divide(total, count, out=np.zeros(len(rows)), where=count > 0))
+        elif field == "price" and category == "housing":
+            cost = store.numeric["cost_per_night"][rows]
+            band = np.full(len(rows), np.nan)
+            lower = -math.inf
+            for limit, name in HOUSING_PRICE_BANDS:
+                band[(cost >= lower) & (cost < limit)] = by_value.get(name, 0.0)
+                lower = limit
+            parts.append(np.nan_to_num(band))
+        else:
+            column = store.categorical["pricing" if field == "price" else field]
+            table = np.zeros(len(column.categories) + 1)
+            for value, w in by_value.items():
+                code = column.index.get(value)
+                if code is not None:
+                    table[code] = w
+            parts.append(table[column.codes[rows]])
+    return np.mean(parts, axis=0)
+
+
+# Step size of the per-session logistic model
+SESSION_RATE = 0.5
+
+
+def new_session_model():
+    """Empty per-session logistic model: a bias plus one weight per taste feature."""
+    return {"b": 0.0, "w": {}}
+
+
+def session_logit(model, features):
+    weights = model["w"]
+    return model["b"] + sum(weights.get(f, 0.0) for f in features)
+
+
+def session_update(model, features, liked):
+    """One SGD step of the session model on a swipe; touches only the card's features."""
+    p = 1.0 / (1.0 + math.exp(-max(min(session_logit(model, features), 30.0), -30.0)))
+    step = SESSION_RATE * ((1.0 if liked else 0.0) - p)
+    model["b"] += step
+    weights = model["w"]
+    for f in features:
+        weights[f] = weights.get(f, 0.0) + step
+    return model
+
+
+def session_order(model, ids, features_of):
+    """ids by predicted like probability, best first; ties keep their current order."""
+    logits = [session_logit(model, features_of(i)) for i in ids]
+    return [ids[j] for j in sorted(range(len(ids)), key=lambda j: (-logits[j], j))]
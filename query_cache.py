@@ -0,0 +1,137 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from availability import stay_nights
+from listing_store import city_key
+from ranking import nights_of, price_range_of, total_budget_of, travelers_of, trip_description_of
+
+
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+
+
+def _labels(values, lower=False):
+    values = [str(v).strip() for v in values or () if str(v).strip()]
+    return tuple(sorted({v.lower() if lower else v for v in values}))
+
+
+def query_signature(category, user_preferences, travel_info):
+    """Hashable, order-insensitive key for the structured inputs a category's filter and ranking read.
+
+    Only the inputs that category uses are included, so e.g. restaurant
+    results are shared across requests that differ only in housing type.
+    The free-text trip description is left out: it only affects ranking and
+    differs on nearly every request, so ranking_signature adds it instead.
+    """
+    signature = (
+        category,
+        city_key(travel_info.get("location")),
+        price_range_of(user_preferences),
+        total_budget_of(travel_info),
+        travelers_of(travel_info),
+    )
+    if category == "housing":
+        return signature + (
+            nights_of(travel_info),
+            stay_nights(travel_info.get("dates")),
+            _labels(user_preferences.get("housing_type")),
+            _labels(travel_info.get("desired_amenities")),
+            _labels(user_preferences.get("preferred_amenities")),
+            str(user_preferences.get("safety_level") or "").lower(),
+        )
+    if category == "cuisine":
+        return signature + (_labels(user_preferences.get("cuisine_types")),)
+    # Experience keywords match case-insensitively
+    return signature + (_labels(user_preferences.get("experience_types"), lower=True),)
+
+
+def ranking_signature(category, user_preferences, travel_info):
+    """query_signature plus the trip description, for rankings and the cursors that page them."""
+    return query_signature(category, user_preferences, travel_info) + (trip_description_of(travel_info).lower(),)
+
+
+def _digest(signature):
+    return hashlib.blake2b(repr(signature).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def encode_cursor(signature, offset):
+    """Opaque page cursor: a digest of the query signature plus the offset of the next result."""
+    payload = json.dumps([_digest(signature), int(offset)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, signature):
+    """The offset a cursor points at; ValueError if it is malformed or was issued for another query."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        digest, offset = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset = int(offset)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("malformed cursor") from None
+    if digest != _digest(signature) or offset < 0:
+        raise ValueError("cursor does not belong to this query")
+    return offset
+
+
+class QueryCache:
+    """Bounded LRU of per-query results, dropped per category when its catalog version changes."""
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._items = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def _check_version(self, category, version):
+        if self._versions.get(category, version) != version:
+            stale = [key for key in self._items if key[1] == category]
+            for key in stale:
+                del self._items[key]
+            self.invalidations += len(stale)
+        self._versions[category] = version
+
+    def get(self, kind, category, signature, version, compute):
+        """Cached compute() for (kind, category, signature) at this catalog version."""
+        key = (kind, category, signature)
+        with self._lock:
+            self._check_version(category, version)
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+        value = compute()
+        with self._lock:
+            self.misses += 1
+            if self._versions.get(category) == version:
+                self._items[key] = value
+                while len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._items),
+                "maxsize": self.maxsize,
+            }
+
+
+query_cache = QueryCache()
@@ -0,0 +1,271 @@
+import re
+from datetime import date
+
+import numpy as np
+
+from collaborative import co_liked
+from personalization import affinity, liked_ids
+
+
+# Feature weights per category; every feature is scaled to [0, 1] first
+WEIGHTS = {
+    "housing": {"price": 2.0, "safety": 2.0, "amenities": 1.5, "capacity": 1.0, "relevance": 2.0, "personal": 1.5, "co_liked": 1.0},
+    "cuisine": {"price": 1.0, "keyword": 2.0, "relevance": 2.0, "personal": 1.5, "co_liked": 1.0},
+    "experience": {"price": 1.0, "keyword": 2.0, "relevance": 2.0, "personal": 1.5, "co_liked": 1.0},
+}
+# Categorical fields whose repeats MMR penalizes; the grid cell stands in for the neighborhood
+DIVERSITY_FIELDS = {
+    "cuisine": ("cuisine_type", "pricing"),
+    "experience": ("keyword", "pricing"),
+}
+# Relevance vs. diversity trade-off, and how many of the best-scored candidates MMR considers
+MMR_LAMBDA = 0.7
+MMR_POOL = 1000
+# safety_level scales the safety weight
+SAFETY_LEVELS = {"high": 1.0, "medium": 0.5, "low": 0.25}
+MAX_SAFETY_RATING = 5.0
+# Score for a feature whose column is missing for a row
+NEUTRAL = 0.5
+
+
+def _as_int(value, default=None):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return default
+
+
+def price_range_of(user_preferences):
+    """(lo, hi) from user_preferences["price_range"], or None if absent or malformed.
+
+    A single number is taken as the upper bound.
+    """
+    value = user_preferences.get("price_range")
+    if not isinstance(value, (list, tuple)):
+        value = [0, value]
+    bounds = [b for b in (_as_int(v) for v in value) if b is not None]
+    if len(bounds) < 2:
+        return None
+    return min(bounds[:2]), max(bounds[:2])
+
+
+def trip_description_of(travel_info):
+    """The user's own words about the trip, whitespace-normalized ("" if none)."""
+    return " ".join(str(travel_info.get("trip_description") or "").split())
+
+
+def total_budget_of(travel_info):
+    """travel_info["total_budget"] as a float ("$2,000" -> 2000.0), or None if absent."""
+    value = travel_info.get("total_budget")
+    if isinstance(value, str):
+        match = re.search(r"\d+(?:\.\d+)?", value.replace(",", ""))
+        value = match.group(0) if match else None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def travelers_of(travel_info):
+    travelers = _as_int(travel_info.get("travelers"), 1)
+    return travelers if travelers and travelers > 0 else 1
+
+
+def nights_of(travel_info):
+    days = []
+    for value in travel_info.get("dates") or []:
+        try:
+            days.append(date.fromisoformat(str(value)[:10]))
+        except ValueError:
+            continue
+    if len(days) < 2:
+        return 1
+    return max((max(days) - min(days)).days, 1)
+
+
+def price_filter(category, user_preferences, travel_info):
+    """(field, lo, hi, keep_missing) bounds for ColumnStore.in_range, or None for no price filter.
+
+    price_range is a nightly range and only applies to housing. total_budget
+    caps a stay at budget / nights and an experience or meal at budget /
+    travelers; listings with unknown prices are kept for budget-only filters
+    of every category, since they cannot be ruled out, but an explicit
+    price_range drops them.
+    """
+    budget = total_budget_of(travel_info)
+    if category == "housing":
+        price_range = price_range_of(user_preferences)
+        lo, hi = price_range if price_range is not None else (None, None)
+        if budget is not None:
+            cap = budget / nights_of(travel_info)
+            hi = cap if hi is None else min(hi, cap)
+        if lo is None and hi is None:
+            return None
+        return "cost_per_night", lo, hi, price_range is None
+    if budget is None:
+        return None
+    cap = budget / travelers_of(travel_info)
+    return ("min_price" if category == "cuisine" else "cost"), None, cap, True
+
+
+def prices(store, category, rows):
+    """The per-row price a category is judged on (NaN where unknown)."""
+    numeric = store.numeric
+    if category == "housing":
+        return numeric["cost_per_night"][rows]
+    if category == "cuisine":
+        lo, hi = numeric["min_price"][rows], numeric["max_price"][rows]
+        return np.where(np.isnan(lo), hi, np.where(np.isnan(hi), lo, (lo + hi) / 2.0))
+    return numeric["cost"][rows]
+
+
+def price_fit(price, lo, hi):
+    """1 inside [lo, hi], falling linearly to 0 one range-width above it.
+
+    Coming in under the range is penalized at half that rate.
+    """
+    width = max(hi - lo, 1.0)
+    outside = np.maximum(lo - price, 0.0) / 2.0 + np.maximum(price - hi, 0.0)
+    return np.where(np.isnan(price), NEUTRAL, np.clip(1.0 - outside / width, 0.0, 1.0))
+
+
+def features(store, category, rows, user_preferences, travel_info, keywords=None, taste=None):
+    """name -> per-row feature array in [0, 1]; features with no input are left out.
+
+    `keywords` are the categorical values (cuisine_type / keyword) that count
+    as a match; None means the user asked for none. `taste` is the user's
+    learned taste vector (personalization.update_taste), if any.
+    """
+    out = {}
+    price_range = price_range_of(user_preferences)
+    if price_range is not None:
+        out["price"] = price_fit(prices(store, category, rows), *price_range)
+    if category == "housing":
+        rating = store.numeric["safety_rating"][rows]
+        out["safety"] = np.where(np.isnan(rating), NEUTRAL, np.clip(rating / MAX_SAFETY_RATING, 0.0, 1.0))
+        desired = list(dict.fromkeys(
+            list(travel_info.get("desired_amenities") or []) + list(user_preferences.get("preferred_amenities") or [])
+        ))
+        if desired:
+            out["amenities"] = store.match_count("amenities", desired, rows) / len(desired)
+        capacity = store.numeric["capacity"][rows]
+        out["capacity"] = np.where(np.isnan(capacity), NEUTRAL, np.minimum(capacity / travelers_of(travel_info), 1.0))
+    elif keywords is not None:
+        field = "cuisine_type" if category == "cuisine" else "keyword"
+        out["keyword"] = store.isin(field, keywords, rows).astype(np.float64)
+    description = trip_description_of(travel_info)
+    if description and store.tfidf is not None:
+        out["relevance"] = store.tfidf.similarity(description, rows)
+    personal = affinity(store, category, rows, taste)
+    if personal is not None:
+        out["personal"] = personal
+    # Precomputed item-neighbour scores of what the user liked before
+    neighbors = co_liked(store, rows, set(liked_ids(taste)))
+    if neighbors is not None:
+        out["co_liked"] = neighbors
+    return out
+
+
+def weights_for(category, user_preferences):
+    weights = dict(WEIGHTS[category])
+    if "safety" in weights:
+        level = str(user_preferences.get("safety_level") or "").lower()
+        weights["safety"] *= SAFETY_LEVELS.get(level, SAFETY_LEVELS["medium"])
+    return weights
+
+
+def top_k(scores, k):
+    """Positions of the k highest scores, best first, ties broken by position.
+
+    Uses a partial partition to find the k-th score instead of sorting all of
+    them; only the k winners are sorted.
+    """
+    n = len(scores)
+    if k <= 0 or not n:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        kth = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        top = np.concatenate([above, ties])
+    else:
+        top = np.arange(n)
+    return top[np.lexsort((top, -scores[top]))]
+
+
+def diversity_codes(store, category, rows):
+    """(len(rows), fields) int64 matrix of the codes MMR compares; -1 marks an unknown value."""
+    columns = [store.categorical[field].codes[rows].astype(np.int64) for field in DIVERSITY_FIELDS[category]]
+    if store.spatial is not None:
+        columns.append(store.spatial.cell_of(rows))
+    return np.column_stack(columns) if columns else np.empty((len(rows), 0), dtype=np.int64)
+
+
+def mmr(relevance, codes, k, lam=MMR_LAMBDA):
+    """Positions of k items chosen by maximal marginal relevance, in pick order.
+
+    Each pick maximizes lam * relevance - (1 - lam) * similarity to the most
+    similar item already picked, where similarity is the fraction of `codes`
+    columns two items share. The running max similarity is updated against
+    the newest pick only, so selection is O(N x k) with no pairwise matrix.
+    `relevance` should be scaled to [0, 1]; ties go to the lower position.
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    fields = max(codes.shape[1], 1)
+    closest = np.zeros(n)
+    taken = np.zeros(n, dtype=bool)
+    picks = np.empty(k, dtype=np.intp)
+    for i in range(k):
+        gain = lam * relevance - (1.0 - lam) * closest
+        gain[taken] = -np.inf
+        pick = picks[i] = int(np.argmax(gain))
+        taken[pick] = True
+        shared = ((codes == codes[pick]) & (codes >= 0)).sum(axis=1) / fields
+        np.maximum(closest, shared, out=closest)
+    return picks
+
+
+def rank(store, category, rows, user_preferences, travel_info, k=10, keywords=None, taste=None):
+    """Score every candidate row at once and return the best k.
+
+    Returns (rows, scores, contributions): the chosen store rows best first,
+    their total scores, and feature name -> weighted contribution arrays
+    aligned with them, so each score can be explained term by term.
+    Categories in DIVERSITY_FIELDS are picked by MMR from the MMR_POOL best
+    scores, so the k are not all the same cuisine, price and area. The first
+    k of a ranking are the same for any larger k, so rankings can be paged.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    weights = weights_for(category, user_preferences)
+    contributions = {
+        name: weights[name] * values
+        for name, values in features(store, category, rows, user_preferences, travel_info, keywords, taste).items()
+    }
+    scores = np.zeros(len(rows))
+    for values in contributions.values():
+        scores += values
+    if category in DIVERSITY_FIELDS:
+        # The pool does not depend on k, so a longer ranking extends a shorter
+        # one; past the pool the rest follow in score order
+        pool = top_k(scores, MMR_POOL)
+        best = scores[pool[0]] if len(pool) else 0.0
+        relevance = scores[pool] / best if best > 0 else np.zeros(len(pool))
+        top = pool[mmr(relevance, diversity_codes(store, category, rows[pool]), k)]
+        if k > len(top):
+            rest = top_k(scores, k)
+            top = np.concatenate([top, rest[~np.isin(rest, top)]])
+    else:
+        top = top_k(scores, k)
+    return rows[top], scores[top], {name: values[top] for name, values in contributions.items()}
+
+
+def explain(scores, contributions, i):
+    """{"score": total, "features": {name: contribution}} for the i-th ranked row."""
+    return {
+        "score": round(float(scores[i]), 4),
+        "features": {name: round(float(values[i]), 4) for name, values in contributions.items()},
+    }
@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import math
+
+import numpy as np
+
+
+# Bits per generation (2 KB); a filter keeps two generations
+SEEN_BITS = 1 << 14
+# False-positive rate of one full generation; lookups check both, so at most about twice this
+SEEN_FALSE_POSITIVE = 0.005
+SEEN_HASHES = round(-math.log2(SEEN_FALSE_POSITIVE))
+# Items a generation takes before it is full and the older one is dropped
+SEEN_CAPACITY = int(-SEEN_BITS * math.log(2) ** 2 / math.log(SEEN_FALSE_POSITIVE))
+# Swipes a session buffers before writing them to the user store
+SEEN_BATCH = 5
+
+
+class SeenFilter:
+    """Bloom filter of the listings a user has already swiped.
+
+    New ids go into the current generation; once it holds SEEN_CAPACITY
+    items it becomes the previous one and a fresh generation starts, so the
+    false-positive rate stays bounded however much a user swipes, the size
+    stays fixed at two generations, and very old swipes eventually come back.
+    """
+
+    def __init__(self, current=None, previous=None, count=0):
+        self.current = np.zeros(SEEN_BITS, dtype=bool) if current is None else current
+        self.previous = np.zeros(SEEN_BITS, dtype=bool) if previous is None else previous
+        self.count = count
+
+    @classmethod
+    def from_record(cls, record):
+        """Filter from its user-record form ({"n": count, "bits": [current, previous]}); empty if missing or malformed."""
+        try:
+            current, previous = (
+                np.unpackbits(np.frombuffer(base64.b64decode(bits), dtype=np.uint8)).astype(bool)
+                for bits in record["bits"]
+            )
+            if len(current) != SEEN_BITS or len(previous) != SEEN_BITS:
+                return cls()
+            return cls(current, previous, int(record["n"]))
+        except (KeyError, TypeError, ValueError):
+            return cls()
+
+    def to_record(self):
+        bits = [base64.b64encode(np.packbits(g).tobytes()).decode("ascii") for g in (self.current, self.previous)]
+        return {"n": self.count, "bits": bits}
+
+    @staticmethod
+    def _positions(category, ids):
+        """(len(ids), SEEN_HASHES) bit positions by double hashing one digest per id."""
+        pairs = [
+            (int.from_bytes(d[:4], "little"), int.from_bytes(d[4:], "little") | 1)
+            for d in (hashlib.blake2b(f"{category}:{i}".encode(), digest_size=8).digest() for i in ids)
+        ]
+        h = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        return (h[:, :1] + np.arange(SEEN_HASHES) * h[:, 1:]) % SEEN_BITS
+
+    def add(self, category, ids):
+        for positions in self._positions(category, ids):
+            if self.count >= SEEN_CAPACITY:
+                self.previous, self.current, self.count = self.current, np.zeros(SEEN_BITS, dtype=bool), 0
+            if not self.current[positions].all():
+                self.current[positions] = True
+                self.count += 1
+
+    def contains(self, category, ids):
+        """Mask over ids: probably swiped before (never False for one that was)."""
+        positions = self._positions(category, ids)
+        return self.current[positions].all(axis=1) | self.previous[positions].all(axis=1)
+
+
+def seen_of(username):
+    """The stored SeenFilter of a user, or None for anonymous users."""
+    from user_store import get_user, is_guest
+
+    if is_guest(username):
+        return None
+    return SeenFilter.from_record(get_user(username).get("seen") or {})
+
+
+def mark_seen(username, swiped):
+    """Fold swipes ({category: ids}) into a user's stored filter.
+
+    Each call rewrites the user store, so sessions batch their swipes
+    through buffer_seen rather than calling this per swipe.
+    """
+    from user_store import is_guest, modify_user
+
+    if is_guest(username) or not any(swiped.values()):
+        return
+
+    def add(user):
+        seen = SeenFilter.from_record(user.get("seen") or {})
+        for category, ids in swiped.items():
+            if ids:
+                seen.add(category, ids)
+        user["seen"] = seen.to_record()
+
+    modify_user(username, add)
+
+
+def buffer_seen(username, pending, category, listing_id):
+    """Add one swipe to a session's `pending` ({category: ids}); write and empty it once it holds SEEN_BATCH.
+
+    Whatever is left when the session ends is written with mark_seen(username, pending).
+    """
+    pending.setdefault(category, []).append(listing_id)
+    if sum(len(ids) for ids in pending.values()) >= SEEN_BATCH:
+        mark_seen(username, pending)
+        pending.clear()
@@ -0,0 +1,147 @@
+import numpy as np
+
+from ranking import top_k
+
+
+# category -> (numeric fields, categorical fields one-hot encoded, multilabel fields)
+FEATURES = {
+    "housing": (
+        ("cost_per_night", "safety_rating", "bedrooms", "bathrooms", "beds", "capacity"),
+        ("housing_type", "rental_type"),
+        ("amenities",),
+    ),
+    "cuisine": (("min_price", "max_price"), ("cuisine_type", "pricing"), ()),
+    "experience": (("cost",), ("keyword", "pricing"), ()),
+}
+# Categoricals with more values than this are left to the text features
+MAX_ONE_HOT = 32
+# Dimensions kept from the TF-IDF text vectors
+TEXT_DIMS = 8
+
+
+def _standardized(values):
+    values = np.asarray(values, dtype=np.float64)
+    known = ~np.isnan(values)
+    if not known.any():
+        return np.zeros(len(values))
+    std = values[known].std() or 1.0
+    return np.where(known, (values - values[known].mean()) / std, 0.0)
+
+
+def _text_vectors(tfidf, n):
+    """Rows of tfidf reduced to TEXT_DIMS unit vectors (fitted on the distinct texts only)."""
+    from sklearn.decomposition import TruncatedSVD
+
+    matrix = tfidf.matrix
+    dims = min(TEXT_DIMS, matrix.shape[0] - 1, matrix.shape[1] - 1)
+    if dims < 1:
+        return np.empty((n, 0))
+    reduced = TruncatedSVD(dims, random_state=0).fit_transform(matrix)
+    reduced /= np.maximum(np.linalg.norm(reduced, axis=1, keepdims=True), 1e-12)
+    return reduced[tfidf.text_of_row]
+
+
+def feature_vectors(store, category):
+    """(len(store), d) float32 feature vectors for a category's listings.
+
+    Standardized numbers and coordinates, one-hot categories, label bits and
+    reduced text, each scaled so one differing value moves a listing about
+    one unit away.
+    """
+    numeric, categorical, multilabel = FEATURES[category]
+    n = len(store)
+    columns = [_standardized(store.numeric[field]) for field in numeric if field in store.numeric]
+    columns += [_standardized(store.numeric[field]) for field in ("lat", "lon") if field in store.numeric]
+    blocks = [np.column_stack(columns)] if columns else []
+    for field in categorical:
+        column = store.categorical.get(field)
+        if column is None or len(column.categories) > MAX_ONE_HOT:
+            continue
+        one_hot = np.zeros((n, len(column.categories)))
+        one_hot[np.arange(n), column.codes] = np.sqrt(0.5)
+        blocks.append(one_hot)
+    for field in multilabel:
+        bitmask = store.multilabel.get(field)
+        if bitmask is not None:
+            bits = np.unpackbits(bitmask.bits.view(np.uint8), axis=1, bitorder="little")[:, :len(bitmask.labels)]
+            blocks.append(bits.astype(np.float64))
+    if store.tfidf is not None:
+        blocks.append(_text_vectors(store.tfidf, n))
+    if not blocks:
+        return np.zeros((n, 1), dtype=np.float32)
+    return np.ascontiguousarray(np.hstack(blocks), dtype=np.float32)
+
+
+class SimilarityIndex:
+    """Approximate nearest neighbours over per-listing feature vectors.
+
+    An inverted-file layout: the vectors are clustered into about sqrt(n)
+    cells (k-means on a sample) and stored grouped by cell, so a query ranks
+    the centroids, reads the `probes` nearest cells as contiguous slices and
+    compares only their listings exactly. Distances come from one
+    matrix-vector product against precomputed squared norms. Stores up to
+    EXACT_LIMIT listings keep one cell and are searched exactly.
+    """
+
+    EXACT_LIMIT = 20000
+    SAMPLE = 100000
+
+    def __init__(self, vectors, probes=8, seed=0):
+        from sklearn.cluster import MiniBatchKMeans
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        self.probes = probes
+        if n <= self.EXACT_LIMIT:
+            centroids = vectors.mean(axis=0, keepdims=True)
+            cell_of = np.zeros(n, dtype=np.intp)
+        else:
+            rng = np.random.default_rng(seed)
+            sample = vectors[rng.choice(n, min(n, self.SAMPLE), replace=False)]
+            kmeans = MiniBatchKMeans(int(np.sqrt(n)), batch_size=4096, n_init=1, random_state=seed).fit(sample)
+            centroids = kmeans.cluster_centers_.astype(np.float32)
+            cell_of = kmeans.predict(vectors)
+        self.order = np.argsort(cell_of, kind="stable")
+        self.vectors = vectors[self.order]
+        self.norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        self.position = np.empty(n, dtype=np.intp)
+        self.position[self.order] = np.arange(n)
+        self.bounds = np.searchsorted(cell_of[self.order], np.arange(len(centroids) + 1))
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.centroid_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def similar(self, row, k=10, rows=None):
+        """(rows, distances) of about the k listings nearest to `row`, itself excluded.
+
+        `rows`, if given, restricts results to those store rows; more cells
+        are probed until enough of them are found.
+        """
+        at = self.position[row]
+        query = self.vectors[at]
+        closeness = 2.0 * (self.centroids @ query) - self.centroid_norms
+        probes = self.probes
+        while True:
+            probe = np.sort(top_k(closeness, probes))
+            slices = [slice(self.bounds[c], self.bounds[c + 1]) for c in probe]
+            members = np.concatenate([np.arange(s.start, s.stop) for s in slices])
+            keep = members != at
+            if rows is not None:
+                keep &= np.isin(self.order[members], rows)
+            if keep.sum() >= k or probes >= len(closeness):
+                break
+            probes *= 4
+        vectors = np.concatenate([self.vectors[s] for s in slices])
+        dist2 = self.norms[members] - 2.0 * (vectors @ query) + self.norms[at]
+        dist2 = np.where(keep, dist2, np.inf)
+        top = top_k(-dist2, min(k, int(keep.sum())))
+        return self.order[members[top]], np.sqrt(np.maximum(dist2[top], 0.0))
+
+
+def build_similarity(store, category):
+    """SimilarityIndex over a store's listings, or None for an empty store."""
+    if not len(store):
+        return None
+    return SimilarityIndex(feature_vectors(store, category))
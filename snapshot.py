@@ -0,0 +1,71 @@
+import hashlib
+import os
+import pickle
+
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), ".catalog_cache")
+
+
+def snapshot_path(source_path, name=""):
+    base = name or os.path.basename(source_path)
+    return os.path.join(SNAPSHOT_DIR, base + ".pkl")
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_snapshot(path, header, payload):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Read-only checkouts still work, they just rebuild on every start.
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def load_snapshot(source_path, build, name="", version=1):
+    """Return build(source_path), reusing a pickled copy while the source is unchanged.
+
+    The snapshot header stores the source's mtime/size and sha256. A matching
+    mtime/size is trusted as-is; otherwise the content hash decides, so a
+    touched-but-identical CSV does not force a rebuild.
+    """
+    st = os.stat(source_path)
+    path = snapshot_path(source_path, name)
+    digest = None
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if header.get("version") == version:
+                if header.get("mtime_ns") == st.st_mtime_ns and header.get("size") == st.st_size:
+                    return pickle.load(f)
+                digest = file_digest(source_path)
+                if header.get("sha256") == digest:
+                    payload = pickle.load(f)
+                    header.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                    _write_snapshot(path, header, payload)
+                    return payload
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        pass
+
+    payload = build(source_path)
+    header = {
+        "version": version,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": digest or file_digest(source_path),
+    }
+    _write_snapshot(path, header, payload)
+    return payload
@@ -10,9 +10,16 @@ import requests
 from extractor import extract_travel_info
 import json
 from app_cool import ai_travel_agent_agno, second_stage_agent
-from housing_listings import housing_id_dict
-from cuisine_listings import cuisine_id_dict
-from experience_listings import experience_id_dict
+from candidates import candidate_page, swipe_update
+from personalization import new_session_model, taste_of
+from seen_filter import buffer_seen, mark_seen, seen_of
+from catalog import catalog
+
+# Live views: they follow catalog hot reloads
+housing_id_dict = catalog.id_view("housing")
+cuisine_id_dict = catalog.id_view("cuisine")
+experience_id_dict = catalog.id_view("experience")
+catalog.watch()
 
 # Configure Streamlit page
 st.set_page_config(
@@ -879,6 +886,17 @@ class TravelEaseApp:
             st.session_state.ai_like = {'housing': [], 'cuisine': [], 'experience': []}
         if 'ai_idx' not in st.session_state:
             st.session_state.ai_idx = {'housing': 0, 'cuisine': 0, 'experience': 0}
+        # Next-page cursor per category: '' = first page not fetched yet, None = no more pages
+        if 'ai_cursor' not in st.session_state:
+            st.session_state.ai_cursor = {'housing': '', 'cuisine': '', 'experience': ''}
+        # Per-category online model that re-sorts the cards not shown yet after each swipe
+        if 'ai_session_model' not in st.session_state:
+            st.session_state.ai_session_model = {}
+        # The user's seen-card filter, read once per deck (None for anonymous users)
+        if 'ai_seen' not in st.session_state:
+            st.session_state.ai_seen = None
+        if 'ai_unsaved' not in st.session_state:
+            st.session_state.ai_unsaved = {}
         if 'ai_final' not in st.session_state:
             st.session_state.ai_final = {}
 
@@ -2106,6 +2124,7 @@ class TravelEaseApp:
                     'dates': dates,
                     'desired_amenities': extracted.get('desired_amenities', []),
                     'travelers': st.session_state.ai_travelers,
+                    'trip_description': st.session_state.ai_text or '',
                     'cuisine_preferences': user_prefs['cuisine_types'],
                     'experience_preferences': user_prefs['experience_types'],
                 }
@@ -2124,8 +2143,11 @@ class TravelEaseApp:
                 except Exception:
                     print("[AI Planner] Travel Info (built):", travel_info)
 
+                username = (st.session_state.user_profile.get('email') if st.session_state.get('user_profile') else 'guest') or 'guest'
+                # A previous deck that was never finished still counts as seen
+                self._save_swipes(username)
                 with st.spinner('Running agent...'):
-                    recs = ai_travel_agent_agno(user_prefs, travel_info)
+                    recs = ai_travel_agent_agno(user_prefs, travel_info, username)
 
                 st.session_state.ai_user_prefs = user_prefs
                 st.session_state.ai_travel_info = travel_info
@@ -2136,6 +2158,9 @@ class TravelEaseApp:
                 }
                 st.session_state.ai_like = {'housing': [], 'cuisine': [], 'experience': []}
                 st.session_state.ai_idx = {'housing': 0, 'cuisine': 0, 'experience': 0}
+                st.session_state.ai_cursor = {'housing': '', 'cuisine': '', 'experience': ''}
+                st.session_state.ai_session_model = {}
+                st.session_state.ai_seen = seen_of(username)
                 st.session_state.ai_step = 'swipe'
                 st.success('Matches ready! Swipe to refine.')
                 st.rerun()
@@ -2144,19 +2169,44 @@ class TravelEaseApp:
             st.markdown('<div id="swipe-ui">', unsafe_allow_html=True)
             st.markdown("### Swipe your curated options")
             cats = [('housing', 'Stay', housing_id_dict), ('cuisine', 'Dining', cuisine_id_dict), ('experience', 'Experience', experience_id_dict)]
+            username = (st.session_state.user_profile.get('email') if st.session_state.get('user_profile') else 'guest') or 'guest'
 
             # Show one category at a time, in order: housing → cuisine → experience
             current = None
             for key, label, mapping in cats:
                 ids = st.session_state.ai_candidates.get(f'{key}_ids', [])
                 idx = st.session_state.ai_idx.get(key, 0)
-                if idx < len(ids):
+                if idx < len(ids) or st.session_state.ai_cursor.get(key) is not None:
                     current = (key, label, mapping, ids, idx)
                     break
 
-            if current is None:
+            if current is not None and current[4] >= len(current[3]):
+                # Curated picks used up: offer the next page of the ranked deck, or move on
+                key, label = current[0], current[1]
+                st.markdown(f"#### {label}")
+                st.caption("That's all the curated picks.")
+                c1, c2 = st.columns(2)
+                with c1:
+                    if st.button(f"🔄 Show more {label}", key=f"more_{key}", use_container_width=True):
+                        page, st.session_state.ai_cursor[key] = candidate_page(
+                            key,
+                            st.session_state.ai_user_prefs,
+                            st.session_state.ai_travel_info,
+                            st.session_state.ai_cursor[key] or None,
+                            taste=taste_of(username),
+                            seen=st.session_state.ai_seen,
+                        )
+                        seen = set(current[3])
+                        current[3].extend(item['id'] for item in page if item['id'] not in seen)
+                        st.rerun()
+                with c2:
+                    if st.button("Next ➡️", key=f"done_{key}", use_container_width=True):
+                        st.session_state.ai_cursor[key] = None
+                        st.rerun()
+            elif current is None:
                 st.success("All categories reviewed!")
                 if st.button("✨ Generate Final Itinerary", use_container_width=True):
+                    self._save_swipes(username)
                     st.session_state.ai_final = self._generate_final_itinerary(
                         st.session_state.ai_user_prefs,
                         st.session_state.ai_travel_info,
@@ -2208,11 +2258,17 @@ class TravelEaseApp:
                 c1, c2 = st.columns(2)
                 with c1:
                     if st.button(f"👎 Pass {label}", key=f"pass_{key}_{idx}", use_container_width=True):
+                        buffer_seen(username, st.session_state.ai_unsaved, key, _id)
+                        model = st.session_state.ai_session_model.setdefault(key, new_session_model())
+                        ids[idx + 1:] = swipe_update(model, key, _id, False, ids[idx + 1:])
                         st.session_state.ai_idx[key] = idx + 1
                         st.rerun()
                 with c2:
                     if st.button(f"❤️ Like {label}", key=f"like_{key}_{idx}", use_container_width=True):
                         st.session_state.ai_like[key].append(_id)
+                        buffer_seen(username, st.session_state.ai_unsaved, key, _id)
+                        model = st.session_state.ai_session_model.setdefault(key, new_session_model())
+                        ids[idx + 1:] = swipe_update(model, key, _id, True, ids[idx + 1:])
                         st.session_state.ai_idx[key] = idx + 1
                         st.rerun()
 
@@ -2279,6 +2335,11 @@ class TravelEaseApp:
                 st.session_state.ai_candidates = {'housing_ids': [], 'cuisine_ids': [], 'experience_ids': []}
                 st.rerun()
 
+    def _save_swipes(self, username):
+        # Write the swipes (liked or passed) still buffered since the last batch to the user's seen filter
+        mark_seen(username, st.session_state.ai_unsaved)
+        st.session_state.ai_unsaved = {}
+
     def _generate_final_itinerary(self, user_prefs, travel_info, likes_dict):
         # Simple stub: assign first liked items per day
         days = travel_info.get('dates', []) or ['Day 1', 'Day 2', 'Day 3']
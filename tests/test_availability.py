@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from availability import AvailabilityCalendar, stay_nights
+from catalog import Catalog
+from housing_listings import build_housing_store
+
+
+def _start_near_wrap(calendar_capacity, before=3):
+    """A start date whose ring slot is `before` slots short of wrapping to 0."""
+    day = date(2025, 1, 1)
+    return day + timedelta(days=(calendar_capacity - before - day.toordinal()) % calendar_capacity)
+
+
+def test_booking_across_ring_wraparound():
+    capacity = AvailabilityCalendar(1).capacity
+    start = _start_near_wrap(capacity)
+    calendar = AvailabilityCalendar(2, start=start)
+    first, last = start + timedelta(days=1), start + timedelta(days=5)
+    assert first.toordinal() % capacity > last.toordinal() % capacity
+    calendar.set(0, first, last)
+    assert calendar.available([0, 1], first, last).tolist() == [False, True]
+    assert calendar.available([0], last + timedelta(days=1), last + timedelta(days=3)).tolist() == [True]
+    for day in range(1, 6):
+        night = start + timedelta(days=day)
+        assert calendar.available([0], night, night).tolist() == [False]
+
+
+def test_roll_frees_reused_slots_and_keeps_bookings():
+    start = date(2025, 3, 1)
+    calendar = AvailabilityCalendar(1, start=start)
+    calendar.set(0, start)
+    calendar.set(0, start + timedelta(days=50))
+    calendar.roll(start + timedelta(days=100))
+    # The slot of the first booking now holds a day inside the new window
+    reused = start + timedelta(days=calendar.capacity)
+    assert calendar.start + timedelta(days=calendar.horizon) > reused
+    assert calendar.available([0], reused, reused).tolist() == [True]
+    # Bookings still inside the window survive
+    booked = start + timedelta(days=120)
+    calendar.set(0, booked)
+    calendar.roll(start + timedelta(days=110))
+    assert calendar.available([0], booked, booked).tolist() == [False]
+
+
+def test_roll_past_whole_ring_frees_everything():
+    start = date(2025, 3, 1)
+    calendar = AvailabilityCalendar(3, start=start)
+    calendar.words[:] = 0
+    today = start + timedelta(days=5 * calendar.capacity)
+    calendar.roll(today)
+    last = today + timedelta(days=calendar.horizon - 1)
+    assert calendar.available([0, 1, 2], today, last).all()
+
+
+def test_nights_outside_window_are_unconstrained():
+    start = date(2025, 6, 1)
+    edge = start + timedelta(days=AvailabilityCalendar(1).horizon - 1)
+    calendar = AvailabilityCalendar.from_spans([[(start, edge)], [(start, start)]], start=start)
+    assert calendar.available([0, 1], edge, edge).tolist() == [True, False]
+    # Past the horizon nothing is scheduled yet, before the start nothing can be booked
+    beyond = edge + timedelta(days=1)
+    assert calendar.available([0, 1], beyond, beyond + timedelta(days=10)).tolist() == [True, True]
+    assert calendar.available([1], start - timedelta(days=9), start - timedelta(days=1)).tolist() == [True]
+    calendar.set(0, edge)
+    assert calendar.available([0], edge, beyond).tolist() == [False]
+
+
+def test_available_matches_day_by_day_check():
+    rng = np.random.default_rng(0)
+    start = date(2025, 1, 1)
+    calendar = AvailabilityCalendar(20, start=start)
+    booked = set()
+    for _ in range(200):
+        row, day = int(rng.integers(20)), int(rng.integers(calendar.horizon))
+        calendar.set(row, start + timedelta(days=day))
+        booked.add((row, day))
+    for _ in range(50):
+        first = int(rng.integers(calendar.horizon))
+        last = min(first + int(rng.integers(1, 15)), calendar.horizon - 1)
+        expected = [all((row, d) not in booked for d in range(first, last + 1)) for row in range(20)]
+        got = calendar.available(np.arange(20), start + timedelta(days=first), start + timedelta(days=last))
+        assert got.tolist() == expected
+
+
+def test_stay_nights_excludes_checkout_day():
+    assert stay_nights(["2025-10-03", "2025-10-01"]) == (date(2025, 10, 1), date(2025, 10, 2))
+    assert stay_nights(["2025-10-01"]) == (date(2025, 10, 1), date(2025, 10, 1))
+    assert stay_nights(["soon"]) is None
+
+
+def test_catalog_journal_keeps_one_entry_per_night():
+    store = build_housing_store([{"id": "H1", "location": "Boston, USA"}, {"id": "H2", "location": "Boston, USA"}])
+    catalog = Catalog({"housing": (lambda: None, lambda path: store, None)}, partitioned=False)
+    start = store.availability.start
+    version = catalog.version("housing")
+    for _ in range(50):
+        assert catalog.set_available("housing", "H1", start, start + timedelta(days=2))
+        assert catalog.set_available("housing", "H1", start + timedelta(days=1), free=True)
+    assert catalog.version("housing") == version + 100
+    assert catalog._availability["housing"] == {"H1": {start: False, start + timedelta(days=1): True, start + timedelta(days=2): False}}
+    assert store.availability.available([0, 1], start, start).tolist() == [False, True]
+    assert not catalog.set_available("housing", "H9", start)
+
+
+def test_catalog_roll_moves_calendars_and_prunes_the_journal():
+    store = build_housing_store([{"id": "H1", "location": "Boston, USA"}])
+    catalog = Catalog({"housing": (lambda: None, lambda path: store, None)}, partitioned=False)
+    start = store.availability.start
+    catalog.set_available("housing", "H1", start, start + timedelta(days=5))
+    version = catalog.version("housing")
+    today = start + timedelta(days=3)
+    assert catalog.roll(today) == ["housing"]
+    assert store.availability.start == today
+    assert catalog.version("housing") == version + 1
+    assert sorted(catalog._availability["housing"]["H1"]) == [today, today + timedelta(days=1), today + timedelta(days=2)]
+    assert catalog.roll(today) == []
+    assert catalog.version("housing") == version + 1
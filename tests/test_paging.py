@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+import candidates
+from cuisine_listings import build_cuisine_store
+from query_cache import decode_cursor, encode_cursor, query_signature
+from ranking import rank
+from seen_filter import SeenFilter
+
+CUISINES = ["Italian", "Chinese", "Mexican", "Thai", "Indian", "American"]
+PRICINGS = ["low", "medium", "high"]
+
+
+@pytest.fixture(scope="module")
+def store():
+    rng = random.Random(0)
+    listings = []
+    for i in range(1500):
+        low = rng.randint(5, 60)
+        listings.append({
+            "id": f"C{i + 1}",
+            "location": "Boston, USA",
+            "name": f"Place {i}",
+            "cuisine_type": rng.choice(CUISINES),
+            "pricing": rng.choice(PRICINGS),
+            "min_price": low,
+            "max_price": low + rng.randint(0, 40),
+        })
+    return build_cuisine_store(listings)
+
+
+def test_cursor_round_trip():
+    signature = query_signature("cuisine", {"cuisine_types": ["Thai"]}, {"location": "Boston, USA"})
+    for offset in (0, 10, 12345):
+        assert decode_cursor(encode_cursor(signature, offset), signature) == offset
+
+
+def test_cursor_rejects_other_queries_and_garbage():
+    signature = query_signature("cuisine", {"cuisine_types": ["Thai"]}, {"location": "Boston, USA"})
+    other = query_signature("cuisine", {"cuisine_types": ["Indian"]}, {"location": "Boston, USA"})
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(signature, 10), other)
+    for cursor in ("", "not a cursor", "W10", encode_cursor(signature, 10)[:-3]):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, signature)
+
+
+def _full_ranking(store, prefs, trip):
+    rows = candidates.candidate_rows("cuisine", prefs, trip)[1]
+    top, _, _ = rank(store, "cuisine", rows, prefs, trip, k=len(rows), keywords=prefs["cuisine_types"])
+    return [store.listing_id(r) for r in top]
+
+
+def _pages(prefs, trip, limit, seen=None):
+    ids, cursor = [], None
+    while True:
+        items, cursor = candidates.candidate_page("cuisine", prefs, trip, cursor, limit=limit, seen=seen)
+        ids += [item["id"] for item in items]
+        if cursor is None:
+            return ids
+
+
+@pytest.fixture
+def city(store, monkeypatch):
+    monkeypatch.setattr(candidates.catalog, "city_store_version", lambda category, location: (store, -1))
+    return store
+
+
+def test_pages_follow_the_full_ranking(city):
+    # Pages come from rankings of power-of-two depths; each deeper ranking
+    # must extend the shallower ones, so paging neither repeats nor skips
+    prefs, trip = {"cuisine_types": ["Thai", "Indian"]}, {"location": "Boston, USA"}
+    assert _pages(prefs, trip, limit=37) == _full_ranking(city, prefs, trip)
+
+
+def test_pages_skip_seen_listings(city):
+    prefs, trip = {"cuisine_types": ["Thai", "Indian"]}, {"location": "Boston, USA"}
+    full = _full_ranking(city, prefs, trip)
+    seen = SeenFilter()
+    seen.add("cuisine", full[:30] + full[100::7])
+    unseen = [i for i, hit in zip(full, seen.contains("cuisine", full)) if not hit]
+    assert len(unseen) < len(full) - 30
+    assert _pages(prefs, trip, limit=25, seen=seen) == unseen
+
+
+def test_page_limit_is_clamped(city):
+    prefs, trip = {"cuisine_types": []}, {"location": "Boston, USA"}
+    items, cursor = candidates.candidate_page("cuisine", prefs, trip, limit=10 ** 9)
+    assert len(items) == candidates.MAX_PAGE_SIZE and cursor is not None
+    items, _ = candidates.candidate_page("cuisine", prefs, trip, limit=0)
+    assert len(items) == 1
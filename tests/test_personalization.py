@@ -0,0 +1,22 @@
+from personalization import new_session_model, session_order, session_update
+
+FEATURES = {
+    "a": ("cuisine_type:Thai", "price:low"),
+    "b": ("cuisine_type:Thai", "price:high"),
+    "c": ("cuisine_type:Pizza", "price:low"),
+    "d": ("cuisine_type:Pizza", "price:high"),
+}
+
+
+def test_session_model_learns_from_swipes():
+    model = new_session_model()
+    session_update(model, FEATURES["a"], liked=True)
+    session_update(model, FEATURES["d"], liked=False)
+    assert model["w"]["cuisine_type:Thai"] > 0 > model["w"]["cuisine_type:Pizza"]
+    order = session_order(model, ["d", "c", "b", "a"], FEATURES.get)
+    assert order[0] == "a" and order[-1] == "d"
+
+
+def test_session_order_keeps_ties_in_place():
+    model = new_session_model()
+    assert session_order(model, ["d", "a", "c"], FEATURES.get) == ["d", "a", "c"]
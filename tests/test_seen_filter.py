@@ -0,0 +1,74 @@
+import json
+
+import user_store
+from seen_filter import SEEN_BATCH, SEEN_CAPACITY, SEEN_FALSE_POSITIVE, SeenFilter, buffer_seen, seen_of
+
+
+def _ids(start, n):
+    return [f"H{i}" for i in range(start, start + n)]
+
+
+def test_no_false_negatives_and_bounded_false_positives():
+    seen = SeenFilter()
+    seen.add("housing", _ids(0, SEEN_CAPACITY))
+    assert seen.contains("housing", _ids(0, SEEN_CAPACITY)).all()
+    # One full generation stays near its target rate
+    rate = seen.contains("housing", _ids(10**6, 50000)).mean()
+    assert rate < 1.5 * SEEN_FALSE_POSITIVE
+    # Two full generations stay within the documented ~2x bound
+    seen.add("housing", _ids(SEEN_CAPACITY, SEEN_CAPACITY))
+    rate = seen.contains("housing", _ids(10**6, 50000)).mean()
+    assert rate < 2.5 * SEEN_FALSE_POSITIVE
+
+
+def test_categories_do_not_collide():
+    seen = SeenFilter()
+    seen.add("housing", _ids(0, 1000))
+    assert seen.contains("cuisine", _ids(0, 1000)).mean() < 0.05
+
+
+def test_rotation_keeps_one_previous_generation():
+    seen = SeenFilter()
+    first = _ids(0, SEEN_CAPACITY)
+    seen.add("housing", first)
+    # Ids that already test positive do not count, so top the generation up to capacity
+    extra = 0
+    while seen.count < SEEN_CAPACITY:
+        seen.add("housing", [f"X{extra}"])
+        extra += 1
+    full = seen.current.copy()
+    seen.add("housing", ["H-next"])
+    assert seen.count == 1
+    assert (seen.previous == full).all()
+    assert seen.contains("housing", first).all()
+    # Two rotations later the first generation is gone (up to false positives)
+    seen.add("housing", _ids(SEEN_CAPACITY, 2 * SEEN_CAPACITY))
+    assert seen.contains("housing", first).mean() < 2.5 * SEEN_FALSE_POSITIVE
+    assert seen.contains("housing", _ids(2 * SEEN_CAPACITY, SEEN_CAPACITY)).all()
+
+
+def test_record_round_trip_is_a_few_kb():
+    seen = SeenFilter()
+    seen.add("cuisine", ["C1", "C2"])
+    record = json.loads(json.dumps(seen.to_record()))
+    assert len(json.dumps(record)) < 6 * 1024
+    again = SeenFilter.from_record(record)
+    assert again.count == 2
+    assert again.contains("cuisine", ["C1", "C2"]).all()
+
+
+def test_malformed_record_gives_empty_filter():
+    for record in ({}, {"n": 3}, {"n": 1, "bits": ["!!", "??"]}, {"n": 1, "bits": ["AAAA", "AAAA"]}):
+        assert not SeenFilter.from_record(record).contains("housing", ["H1"]).any()
+
+
+def test_swipes_are_written_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(user_store, "STORE_PATH", str(tmp_path / "user_store.json"))
+    pending = {}
+    for i in range(SEEN_BATCH - 1):
+        buffer_seen("ana", pending, "housing", f"H{i}")
+    assert not seen_of("ana").contains("housing", ["H0"]).any()
+    buffer_seen("ana", pending, "cuisine", "C1")
+    assert pending == {}
+    assert seen_of("ana").contains("housing", _ids(0, SEEN_BATCH - 1)).all()
+    assert seen_of("ana").contains("cuisine", ["C1"]).all()
@@ -0,0 +1,50 @@
+import numpy as np
+
+from similarity import SimilarityIndex
+
+
+def _clustered(n, d=12, centers=60, seed=0):
+    rng = np.random.default_rng(seed)
+    means = rng.normal(scale=4.0, size=(centers, d))
+    return (means[rng.integers(centers, size=n)] + rng.normal(size=(n, d))).astype(np.float32)
+
+
+def _brute_force(vectors, row, k, rows=None):
+    dist = ((vectors - vectors[row]) ** 2).sum(axis=1)
+    dist[row] = np.inf
+    if rows is not None:
+        mask = np.full(len(vectors), np.inf)
+        mask[rows] = 0.0
+        dist = dist + mask
+    return set(np.argsort(dist, kind="stable")[:k].tolist())
+
+
+def test_ivf_recall_against_brute_force():
+    vectors = _clustered(SimilarityIndex.EXACT_LIMIT + 10000)
+    index = SimilarityIndex(vectors)
+    assert len(index.centroids) > 1
+    queries = np.random.default_rng(1).choice(len(vectors), 100, replace=False)
+    recall = np.mean([
+        len(set(index.similar(q, 10)[0].tolist()) & _brute_force(vectors, q, 10)) / 10 for q in queries
+    ])
+    assert recall >= 0.8
+
+
+def test_small_stores_are_exact_and_sorted():
+    vectors = _clustered(2000)
+    index = SimilarityIndex(vectors)
+    for q in (0, 17, 1999):
+        rows, dist = index.similar(q, 10)
+        assert set(rows.tolist()) == _brute_force(vectors, q, 10)
+        assert q not in rows
+        assert np.all(np.diff(dist) >= -1e-4)
+        assert np.allclose(dist, np.linalg.norm(vectors[rows] - vectors[q], axis=1), atol=1e-3)
+
+
+def test_restricted_rows():
+    vectors = _clustered(SimilarityIndex.EXACT_LIMIT + 5000)
+    index = SimilarityIndex(vectors)
+    allowed = np.arange(0, len(vectors), 7)
+    rows, _ = index.similar(3, 10, rows=allowed)
+    assert len(rows) == 10
+    assert np.isin(rows, allowed).all()
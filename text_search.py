@@ -0,0 +1,152 @@
+import math
+import re
+
+import numpy as np
+
+from ranking import top_k
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and at by for from in into of on or the to with we our i me my is are be".split()
+)
+
+
+def _stem(token):
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("s") and not token.endswith("ss") and len(token) > 3:
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Lower-case word tokens, stopwords dropped and plurals folded ("Oysters" -> "oyster")."""
+    return [_stem(t) for t in TOKEN_RE.findall(str(text or "").lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring.
+
+    Documents are store rows. Rows with identical text share one indexed
+    text, so posting lists run over distinct texts and a query scores each
+    distinct text once before expanding to rows. add() appends a batch of
+    rows (e.g. one shard) and can be called again as data arrives.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = 0
+        self.total_len = 0.0
+        self._text_rows = []
+        self._text_len = []
+        self._postings = {}
+        self._frozen = None
+
+    def add(self, rows, texts):
+        """Index texts[i] as document rows[i]."""
+        import pandas as pd
+
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        codes, uniques = pd.factorize(np.asarray(texts, dtype=object), sort=False)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        for u, text in enumerate(uniques):
+            tid = len(self._text_rows)
+            docs = rows[order[bounds[u]:bounds[u + 1]]]
+            tokens = tokenize(text)
+            self._text_rows.append(docs)
+            self._text_len.append(len(tokens))
+            self.total_len += len(tokens) * len(docs)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                self._postings.setdefault(token, []).append((tid, tf))
+        self.size += len(rows)
+        self._frozen = None
+
+    def _freeze(self):
+        if self._frozen is None:
+            self._frozen = (
+                np.array([len(r) for r in self._text_rows], dtype=np.float64),
+                np.array(self._text_len, dtype=np.float64),
+                {},
+            )
+        return self._frozen
+
+    def _posting(self, term):
+        counts, _, postings = self._freeze()
+        posting = postings.get(term)
+        if posting is None and term in self._postings:
+            pairs = np.array(self._postings[term], dtype=np.int64).reshape(-1, 2)
+            tids = pairs[:, 0]
+            posting = postings[term] = (tids, pairs[:, 1].astype(np.float64), float(counts[tids].sum()))
+        return posting
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_frozen"] = None
+        return state
+
+    def search(self, query, k=10, rows=None):
+        """(rows, scores) of the k best matches for `query`, best first.
+
+        `rows`, if given, restricts results to those store rows.
+        """
+        postings = [p for p in (self._posting(t) for t in dict.fromkeys(tokenize(query))) if p is not None]
+        if not postings or not self.size:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        _, text_len, _ = self._freeze()
+        avg_len = self.total_len / self.size or 1.0
+        tids = np.concatenate([p[0] for p in postings])
+        scores = np.concatenate([
+            math.log(1.0 + (self.size - df + 0.5) / (df + 0.5))
+            * tfs * (self.k1 + 1.0) / (tfs + self.k1 * (1.0 - self.b + self.b * text_len[t] / avg_len))
+            for t, tfs, df in postings
+        ])
+        if len(postings) > 1:
+            tids, inverse = np.unique(tids, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores)
+        # Best texts first, expanded to rows until k are found. Text ids follow
+        # first appearance, so ties go to the text seen first. Each text has at
+        # least one row, so without a row filter the top k texts are enough.
+        order = top_k(scores, k if rows is None else len(scores))
+        out_rows, out_scores = [], []
+        found = 0
+        for i in order:
+            docs = self._text_rows[tids[i]]
+            if rows is not None:
+                docs = docs[np.isin(docs, rows)]
+            docs = docs[:k - found]
+            if not len(docs):
+                continue
+            out_rows.append(docs)
+            out_scores.append(np.full(len(docs), scores[i]))
+            found += len(docs)
+            if found >= k:
+                break
+        if not out_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(out_rows), np.concatenate(out_scores)
+
+
+def join_text(*columns):
+    """Row-wise "a b" join of equal-length string columns (None counts as empty)."""
+    columns = [np.asarray(["" if v is None else v for v in c] if isinstance(c, list) else c, dtype=str) for c in columns]
+    out = columns[0]
+    for column in columns[1:]:
+        out = np.char.add(np.char.add(out, " "), column)
+    return out
+
+
+def index_text(store, batches):
+    """Attach a BM25Index to store.text_index from (first_row, texts) batches, e.g. one per shard."""
+    index = BM25Index()
+    for start, texts in batches:
+        index.add(np.arange(start, start + len(texts)), texts)
+    store.text_index = index
+    return store
@@ -0,0 +1,40 @@
+import numpy as np
+
+from text_search import tokenize
+
+
+class TfidfIndex:
+    """Sparse TF-IDF vectors for a store's rows, for ranking against free text.
+
+    The vectorizer is fitted on the distinct row texts and `matrix` holds one
+    L2-normalized row per distinct text, so a query's cosine similarity to
+    every listing is one sparse matrix-vector product plus a gather.
+    Pickles with the store (or on its own) so it is fitted once per source.
+    """
+
+    def __init__(self, texts):
+        import pandas as pd
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        codes, uniques = pd.factorize(np.asarray(texts, dtype=object), sort=False)
+        self.text_of_row = codes.astype(np.int32)
+        # Same tokens as the BM25 index, so "oysters" meets "Oyster House"
+        self.vectorizer = TfidfVectorizer(analyzer=tokenize, sublinear_tf=True, dtype=np.float32)
+        self.matrix = self.vectorizer.fit_transform([str(u) for u in uniques]).tocsr()
+
+    def similarity(self, query, rows):
+        """Cosine similarity in [0, 1] between `query` and each of `rows`."""
+        query_vector = self.vectorizer.transform([query or ""])
+        if not query_vector.nnz:
+            return np.zeros(len(rows))
+        sims = np.asarray((self.matrix @ query_vector.T).todense(), dtype=np.float64).ravel()
+        return sims[self.text_of_row[rows]]
+
+
+def build_tfidf(texts):
+    """TfidfIndex over texts, or None when they hold no usable terms."""
+    try:
+        return TfidfIndex(texts)
+    except ValueError:
+        # Empty vocabulary: no rows, or only stopwords
+        return None
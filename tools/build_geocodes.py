@@ -0,0 +1,53 @@
+import argparse
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import catalog  # noqa: E402
+from geo import GEOCODES_CSV, load_geocodes  # noqa: E402
+from listing_store import city_key  # noqa: E402
+
+
+def missing_places(table):
+    """(city, place) pairs the catalogs reference that the table cannot resolve."""
+    wanted = set()
+    for category in ("housing", "cuisine", "experience"):
+        wanted.update((city, "") for city in catalog.store(category).by_city)
+    housing = catalog.store("housing")
+    wanted.update((city_key(h["location"]), h["neighborhood"].strip().lower()) for h in housing.records)
+    return sorted(key for key in wanted if key not in table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add missing cities/neighborhoods to the offline geocode table")
+    parser.add_argument("--out", default=GEOCODES_CSV)
+    parser.add_argument("--user-agent", default="travelease-geocoder")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    missing = missing_places(load_geocodes(args.out))
+    if args.dry_run or not missing:
+        for location, place in missing:
+            print(f"missing: {place + ', ' if place else ''}{location}")
+        return
+
+    # The only network access is here, offline; requests never geocode
+    from geopy.extra.rate_limiter import RateLimiter
+    from geopy.geocoders import Nominatim
+
+    geocode = RateLimiter(Nominatim(user_agent=args.user_agent).geocode, min_delay_seconds=1)
+    with open(args.out, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for location, place in missing:
+            result = geocode(f"{place}, {location}" if place else location)
+            if result is None:
+                print(f"not found: {place + ', ' if place else ''}{location}")
+                continue
+            writer.writerow([location, place, round(result.latitude, 4), round(result.longitude, 4)])
+            print(f"added: {place + ', ' if place else ''}{location}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collaborative import (  # noqa: E402
+    ITEM_NEIGHBORS_PATH,
+    SHRINK,
+    TOP_NEIGHBORS,
+    item_neighbors,
+    liked_sets,
+    write_item_neighbors,
+)
+from user_store import load_store  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the item-neighbour table from the swipe likes in the user store")
+    parser.add_argument("--out", default=ITEM_NEIGHBORS_PATH)
+    parser.add_argument("--top", type=int, default=TOP_NEIGHBORS)
+    parser.add_argument("--shrink", type=float, default=SHRINK)
+    args = parser.parse_args()
+
+    liked = liked_sets(load_store())
+    table = item_neighbors(liked, top=args.top, shrink=args.shrink)
+    write_item_neighbors(table, args.out)
+    print(f"{len(table)} items with neighbours from {len(liked)} users -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
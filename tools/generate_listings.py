@@ -0,0 +1,270 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from columnar import write_shard  # noqa: E402
+from housing_listings import (  # noqa: E402
+    AMENITIES_LIST, BOSTON_NEIGHBORHOODS, CSV_FIELDS, HOUSING_TYPES, RENTAL_TYPES, REVIEW_SNIPPETS,
+)
+
+
+CITIES = [
+    ("Boston", "MA"), ("Cambridge", "MA"), ("New York", "NY"), ("San Francisco", "CA"),
+    ("Chicago", "IL"), ("Seattle", "WA"), ("Austin", "TX"), ("Miami", "FL"),
+    ("Denver", "CO"), ("Portland", "OR"), ("Philadelphia", "PA"), ("Washington", "DC"),
+]
+CUISINE_TYPES = [
+    "Italian", "American", "Chinese", "Japanese", "Mexican", "Indian", "French",
+    "Thai", "Seafood", "Mediterranean", "Korean", "Vietnamese", "Greek", "Spanish",
+]
+RESTAURANT_PREFIXES = [
+    "The North End", "Harbor", "Back Bay", "Golden", "Little", "Old Town", "Blue",
+    "Corner", "Copper", "Union", "Lantern", "Salt", "Fig", "Maple", "Red Door",
+]
+RESTAURANT_SUFFIXES = [
+    "Trattoria", "Grille", "Kitchen", "Bistro", "Tavern", "Noodle House", "Taqueria",
+    "Oyster Bar", "Cafe", "Diner", "Sushi Bar", "Curry House", "Brasserie", "Cantina",
+]
+COMPANY_PREFIXES = ["City", "Harbor", "Liberty", "Patriot", "Bay State", "Old Colony", "Beacon", "Coastal"]
+COMPANY_SUFFIXES = ["Tours", "Adventures", "Experiences", "Outfitters", "Society", "Company"]
+# (description, keyword) pairs; keywords match experience_listings._categorize_keyword
+EXPERIENCE_ACTIVITIES = [
+    ("Whale Watching Tour", "Sightseeing"), ("Duck Boat Sightseeing Tour", "Sightseeing"),
+    ("Harbor Sunset Cruise", "Sightseeing"), ("Kayak Adventure", "Adventure"),
+    ("Guided Bike Ride", "Adventure"), ("Coastal Hiking Trip", "Adventure"),
+    ("Art Museum Pass", "Museum"), ("Science Exhibit Visit", "Museum"),
+    ("Improv Comedy Night", "Comedy"), ("Stand-up Comedy Show", "Comedy"),
+    ("Cooking Class", "Education"), ("Robotics Workshop", "Education"),
+    ("Historic Walking Tour", "Historic"), ("Colonial History Reenactment", "Historic"),
+    ("Garden Tea Afternoon", "Relaxing"), ("Quiet Courtyard Picnic", "Relaxing"),
+]
+OPTIMAL_HOURS = ["9 AM - 12 PM", "9 AM - 5 PM", "10 AM - 4 PM", "12 PM - 3 PM", "5 PM - 8 PM", "7 PM - 10 PM"]
+FILE_NAMES = {
+    "housing": "airbnb_data.csv",
+    "cuisine": "restaurants.csv",
+    "experience": "experiences.csv",
+}
+
+
+def _cities(count):
+    cities = CITIES[:count]
+    cities += [(f"Testville {i}", "ZZ") for i in range(len(cities), count)]
+    return cities
+
+
+def _subset_table(vocab, sep):
+    """Joined string for every subset of `vocab`, indexed by its bitmask."""
+    table = np.empty(1 << len(vocab), dtype=object)
+    for mask in range(len(table)):
+        table[mask] = sep.join(v for b, v in enumerate(vocab) if mask >> b & 1)
+    return table
+
+
+def _random_subsets(rng, n, size, lo, hi):
+    """Bitmask per row with between lo and hi (inclusive) of `size` bits set."""
+    ranks = rng.random((n, size)).argsort(axis=1).argsort(axis=1)
+    k = rng.integers(lo, hi + 1, n)
+    chosen = ranks < k[:, None]
+    return (chosen.astype(np.uint64) << np.arange(size, dtype=np.uint64)).sum(axis=1, dtype=np.uint64)
+
+
+def _product_table(left, right):
+    return np.array([f"{a} {b}" for a in left for b in right], dtype=object)
+
+
+_AMENITY_STRINGS = None
+_REVIEW_STRINGS = None
+
+
+def housing_chunk(rng, start, n, cities):
+    global _AMENITY_STRINGS, _REVIEW_STRINGS
+    if _AMENITY_STRINGS is None:
+        _AMENITY_STRINGS = _subset_table(AMENITIES_LIST, ", ")
+        _REVIEW_STRINGS = _subset_table(REVIEW_SNIPPETS, "; ")
+
+    housing_type = rng.integers(0, len(HOUSING_TYPES), n).astype(np.int8)
+    bedrooms = rng.integers(1, 6, n)
+    bathrooms = rng.integers(1, np.maximum(1, bedrooms - 1) + 1)
+    beds = rng.integers(bedrooms, bedrooms * 2 + 1)
+    rental_type = rng.integers(0, len(RENTAL_TYPES), n).astype(np.int8)
+
+    # Same pricing model as housing_listings.generate_listings
+    cost = (80 + bedrooms * 50 + bathrooms * 25) * np.array([1.0, 0.6, 0.4])[rental_type]
+    cost = cost + rng.integers(-20, 21, n)
+    cost = (np.round(cost / 5) * 5).astype(np.int32)
+
+    safety = np.round(rng.uniform(3.5, 5.0, n), 2)
+    neighborhood = rng.integers(0, len(BOSTON_NEIGHBORHOODS), n).astype(np.int16)
+    city = rng.integers(0, len(cities), n).astype(np.int32)
+    amenities = _random_subsets(rng, n, len(AMENITIES_LIST), 4, 10)
+    reviews = _random_subsets(rng, n, len(REVIEW_SNIPPETS), 2, 5)
+    ids = np.arange(start + 1, start + n + 1, dtype=np.int64)
+
+    city_names = np.array([c for c, _ in cities], dtype=object)
+    frame = {
+        "location": city_names[city],
+        "safety_rating": safety,
+        "neighborhood": np.array(BOSTON_NEIGHBORHOODS, dtype=object)[neighborhood],
+        "housing_type": np.array(HOUSING_TYPES, dtype=object)[housing_type],
+        "bedrooms": bedrooms,
+        "bathrooms": bathrooms,
+        "beds": beds,
+        "rental_type": np.array(RENTAL_TYPES, dtype=object)[rental_type],
+        "cost_per_night": cost,
+        "amenities": _AMENITY_STRINGS[amenities.astype(np.intp)],
+        "reviews": _REVIEW_STRINGS[reviews.astype(np.intp)],
+        "id": np.char.add("H", ids.astype(str)),
+    }
+    columns = {
+        "id": ids,
+        "location": city,
+        "safety_rating": safety,
+        "neighborhood": neighborhood,
+        "housing_type": housing_type,
+        "bedrooms": bedrooms.astype(np.int8),
+        "bathrooms": bathrooms.astype(np.int8),
+        "beds": beds.astype(np.int8),
+        "rental_type": rental_type,
+        "cost_per_night": cost,
+        "amenities": amenities,
+        "reviews": reviews,
+    }
+    vocabularies = {
+        "location": list(city_names),
+        "neighborhood": BOSTON_NEIGHBORHOODS,
+        "housing_type": HOUSING_TYPES,
+        "rental_type": RENTAL_TYPES,
+        "amenities": AMENITIES_LIST,
+        "reviews": REVIEW_SNIPPETS,
+    }
+    return {k: frame[k] for k in CSV_FIELDS}, columns, vocabularies
+
+
+def cuisine_chunk(rng, start, n, cities):
+    names = _product_table(RESTAURANT_PREFIXES, RESTAURANT_SUFFIXES)
+    name = rng.integers(0, len(names), n).astype(np.int32)
+    cuisine_type = rng.integers(0, len(CUISINE_TYPES), n).astype(np.int16)
+    min_price = (rng.integers(2, 16, n) * 5).astype(np.int32)
+    max_price = (min_price + rng.integers(2, 13, n) * 5).astype(np.int32)
+    city = rng.integers(0, len(cities), n).astype(np.int32)
+    ids = np.arange(start + 1, start + n + 1, dtype=np.int64)
+
+    city_locations = np.array([f"{c}, {s}" for c, s in cities], dtype=object)
+    frame = {
+        "": names[name],
+        "Cuisine Type": np.array(CUISINE_TYPES, dtype=object)[cuisine_type],
+        "Min Price ($)": min_price,
+        "Max Price ($)": max_price,
+        "City Location": city_locations[city],
+    }
+    columns = {
+        "id": ids,
+        "name": name,
+        "cuisine_type": cuisine_type,
+        "min_price": min_price,
+        "max_price": max_price,
+        "location": city,
+    }
+    vocabularies = {
+        "name": list(names),
+        "cuisine_type": CUISINE_TYPES,
+        "location": list(city_locations),
+    }
+    return frame, columns, vocabularies
+
+
+def experience_chunk(rng, start, n, cities):
+    companies = _product_table(COMPANY_PREFIXES, COMPANY_SUFFIXES)
+    company = rng.integers(0, len(companies), n).astype(np.int32)
+    activity = rng.integers(0, len(EXPERIENCE_ACTIVITIES), n).astype(np.int16)
+    cost = (rng.integers(0, 41, n) * 5).astype(np.int32)
+    hours = rng.integers(0, len(OPTIMAL_HOURS), n).astype(np.int8)
+    city = rng.integers(0, len(cities), n).astype(np.int32)
+    ids = np.arange(start + 1, start + n + 1, dtype=np.int64)
+
+    descriptions = np.array([d for d, _ in EXPERIENCE_ACTIVITIES], dtype=object)
+    keywords = np.array([k for _, k in EXPERIENCE_ACTIVITIES], dtype=object)
+    city_locations = np.array([f"{c}, {s}" for c, s in cities], dtype=object)
+    frame = {
+        "Company Name": companies[company],
+        "City Location": city_locations[city],
+        "Country": np.full(n, "United States", dtype=object),
+        "Experience Description": descriptions[activity],
+        "Cost ($)": np.where(cost == 0, "Free", cost.astype(str)),
+        "Optimal Hours": np.array(OPTIMAL_HOURS, dtype=object)[hours],
+        "Keyword": keywords[activity],
+    }
+    columns = {
+        "id": ids,
+        "company": company,
+        "location": city,
+        "experience": activity,
+        "cost": cost,
+        "hours": hours,
+    }
+    vocabularies = {
+        "company": list(companies),
+        "location": list(city_locations),
+        "experience": list(descriptions),
+        "keyword": list(keywords),
+        "hours": OPTIMAL_HOURS,
+    }
+    return frame, columns, vocabularies
+
+
+CHUNKS = {
+    "housing": housing_chunk,
+    "cuisine": cuisine_chunk,
+    "experience": experience_chunk,
+}
+
+
+def generate(kind, rows, seed, out_dir, chunk_size=250_000, formats=("csv", "npy"), num_cities=1):
+    """Stream `rows` synthetic listings of `kind` to out_dir, one chunk at a time.
+
+    Chunk i draws from SeedSequence(seed).spawn(...)[i], so the output is fully
+    determined by (seed, rows, chunk_size, num_cities).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    cities = _cities(num_cities)
+    starts = range(0, rows, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    csv_path = os.path.join(out_dir, FILE_NAMES[kind])
+    for i, start in enumerate(starts):
+        n = min(chunk_size, rows - start)
+        frame, columns, vocabularies = CHUNKS[kind](np.random.default_rng(seeds[i]), start, n, cities)
+        if "csv" in formats:
+            pd.DataFrame(frame).to_csv(csv_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        if "npy" in formats:
+            write_shard(os.path.join(out_dir, kind, f"shard-{i:05d}"), columns, vocabularies)
+    return csv_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate large seeded synthetic listing datasets")
+    parser.add_argument("--kind", choices=["housing", "cuisine", "experience", "all"], default="all")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--seed", type=int, required=True)
+    parser.add_argument("--out", default="generated")
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    parser.add_argument("--cities", type=int, default=1)
+    parser.add_argument("--format", choices=["csv", "npy", "both"], default="both")
+    args = parser.parse_args()
+
+    formats = ("csv", "npy") if args.format == "both" else (args.format,)
+    kinds = list(CHUNKS) if args.kind == "all" else [args.kind]
+    for kind in kinds:
+        t0 = time.perf_counter()
+        generate(kind, args.rows, args.seed, args.out, args.chunk_size, formats, args.cities)
+        elapsed = time.perf_counter() - t0
+        print(f"{kind}: {args.rows} rows in {elapsed:.1f}s ({args.rows / elapsed * 60 / 1e6:.1f}M rows/min)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,73 @@
 import json
 import os
-from typing import Dict, Any
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within one process
+    fcntl = None
 
 
 STORE_PATH = os.path.join(os.path.dirname(__file__), "user_store.json")
+# Shared account of anonymous sessions; nothing learned per user is kept for it
+GUEST = "guest"
+
+_lock = threading.Lock()
 
 
 def _ensure_store() -> None:
     if not os.path.exists(STORE_PATH):
-        with open(STORE_PATH, "w", encoding="utf-8") as f:
-            json.dump({}, f)
+        with _locked():
+            if not os.path.exists(STORE_PATH):
+                _write_store({})
+
+
+@contextmanager
+def _locked():
+    """Serialize read-modify-write cycles across threads and processes."""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        with open(STORE_PATH + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_store() -> Dict[str, Any]:
+    # Raises json.JSONDecodeError on a corrupt file
+    with open(STORE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_store(store: Dict[str, Any]) -> None:
+    # Readers see the old file or the new one, never a partial write
+    tmp_path = f"{STORE_PATH}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(store, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, STORE_PATH)
 
 
 def load_store() -> Dict[str, Any]:
     _ensure_store()
-    with open(STORE_PATH, "r", encoding="utf-8") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return {}
+    try:
+        return _read_store()
+    except json.JSONDecodeError:
+        return {}
 
 
 def save_store(store: Dict[str, Any]) -> None:
-    with open(STORE_PATH, "w", encoding="utf-8") as f:
-        json.dump(store, f, ensure_ascii=False, indent=2)
+    with _locked():
+        _write_store(store)
+
+
+def is_guest(key: str) -> bool:
+    return not key or key == GUEST
 
 
 def get_user(key: str) -> Dict[str, Any]:
@@ -31,17 +75,28 @@ def get_user(key: str) -> Dict[str, Any]:
     return store.get(key, {"preferences": {}, "state": {}, "history": []})
 
 
-def update_user(key: str, updates: Dict[str, Any]) -> Dict[str, Any]:
-    store = load_store()
-    user = store.get(key, {"preferences": {}, "state": {}, "history": []})
-    # Shallow merge for top-level keys
-    for k, v in updates.items():
-        if isinstance(v, dict) and isinstance(user.get(k), dict):
-            user[k].update(v)
-        else:
-            user[k] = v
-    store[key] = user
-    save_store(store)
+def modify_user(key: str, change: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    """Apply change(user) to one record in place and save it, atomically with respect to other writers.
+
+    Raises json.JSONDecodeError rather than overwriting a store that fails to parse.
+    """
+    _ensure_store()
+    with _locked():
+        store = _read_store()
+        user = store.get(key, {"preferences": {}, "state": {}, "history": []})
+        change(user)
+        store[key] = user
+        _write_store(store)
     return user
 
 
+def update_user(key: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+    def merge(user):
+        # Shallow merge for top-level keys
+        for k, v in updates.items():
+            if isinstance(v, dict) and isinstance(user.get(k), dict):
+                user[k].update(v)
+            else:
+                user[k] = v
+
+    return modify_user(key, merge)